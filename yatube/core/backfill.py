@@ -0,0 +1,69 @@
+import time
+
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import BackfillCheckpoint
+
+BACKFILLS = {}
+
+
+def backfill(model, batch_size=1000, sleep=0.1):
+    """Регистрирует функцию дозаполнения данных таблицы model.
+
+    Функция получает выборку строк одного диапазона id и возвращает
+    число измененных строк. Диапазоны обрабатываются по очереди,
+    каждый в своей короткой транзакции, поэтому таблица не
+    блокируется надолго, а прерванный проход продолжается с места
+    остановки.
+    """
+    def decorator(func):
+        func.backfill_name = f'{func.__module__}.{func.__name__}'
+        func.model = model
+        func.batch_size = batch_size
+        func.sleep = sleep
+        BACKFILLS[func.backfill_name] = func
+        return func
+    return decorator
+
+
+def run_backfill(func, batch_size=None, sleep=None, restart=False,
+                 limit=None):
+    """Обрабатывает диапазоны id от сохраненной точки до id последней
+    строки на момент первого запуска и возвращает ход дозаполнения.
+
+    Строки, добавленные позже, уже пишет новый код, поэтому верхняя
+    граница фиксируется. limit ограничивает число диапазонов
+    за один вызов.
+    """
+    batch_size = batch_size or func.batch_size
+    sleep = func.sleep if sleep is None else sleep
+    checkpoint, created = BackfillCheckpoint.objects.get_or_create(
+        name=func.backfill_name)
+    if restart or created:
+        bounds = func.model.objects.aggregate(
+            min_pk=Min('pk'), max_pk=Max('pk'))
+        checkpoint.last_pk = (bounds['min_pk'] or 1) - 1
+        checkpoint.max_pk = bounds['max_pk'] or 0
+        checkpoint.processed = 0
+        checkpoint.finished = None
+        checkpoint.save()
+    batches = 0
+    while checkpoint.last_pk < checkpoint.max_pk:
+        if limit is not None and batches >= limit:
+            return checkpoint
+        end = min(checkpoint.last_pk + batch_size, checkpoint.max_pk)
+        with transaction.atomic():
+            changed = func(func.model.objects.filter(
+                pk__gt=checkpoint.last_pk, pk__lte=end))
+            checkpoint.last_pk = end
+            checkpoint.processed += changed or 0
+            checkpoint.save()
+        batches += 1
+        if sleep:
+            time.sleep(sleep)
+    if checkpoint.finished is None:
+        checkpoint.finished = timezone.now()
+        checkpoint.save()
+    return checkpoint
@@ -0,0 +1,106 @@
+import hashlib
+import re
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import patch_cache_control
+
+from .compression import deflate
+
+PLACEHOLDER = '<!--personal:{}-->'
+PLACEHOLDER_RE = re.compile(r'<!--personal:(.+?)-->')
+
+
+def page_cache_key(key_prefix, request):
+    url = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'{key_prefix}:{url}'
+
+
+def fill_personal(content, fragments, request):
+    """Подставляет на место меток фрагменты текущего пользователя."""
+    for template_name in fragments:
+        content = content.replace(
+            PLACEHOLDER.format(template_name),
+            render_to_string(template_name, request=request)
+        )
+    return content
+
+
+def split_personal(content, charset):
+    """Делит страницу на общие куски и имена персональных шаблонов.
+
+    Общие куски хранятся вместе со сжатой версией, чтобы при ответе
+    из кеша сжимать только персональные фрагменты.
+    """
+    parts = PLACEHOLDER_RE.split(content)
+    for index, part in enumerate(parts):
+        if index % 2 == 0:
+            raw = part.encode(charset)
+            parts[index] = (raw, deflate(raw))
+    return parts
+
+
+def join_personal(parts, charset, request):
+    """Куски страницы для пользователя: (исходные, сжатые или None)."""
+    chunks = []
+    for index, part in enumerate(parts):
+        if index % 2:
+            fragment = render_to_string(part, request=request)
+            part = (fragment.encode(charset), None)
+        chunks.append(part)
+    return chunks
+
+
+def shared_cache_page(timeout, key_prefix):
+    """Кеширует страницу целиком, общую для всех пользователей.
+
+    Персональные фрагменты, подключенные тегом {% personal %}, в кеш
+    попадают метками и заполняются после чтения из кеша для каждого
+    запроса отдельно. Куски страницы передаются ответу в gzip_chunks
+    для CompressionMiddleware.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+            key = page_cache_key(key_prefix, request)
+            entry = cache.get(key)
+            if entry is None:
+                request.personal_fragments = set()
+                try:
+                    response = view_func(request, *args, **kwargs)
+                    if hasattr(response, 'render'):
+                        response.render()
+                finally:
+                    fragments = request.personal_fragments
+                    del request.personal_fragments
+                if response.status_code != 200 or response.streaming:
+                    if fragments:
+                        response.content = fill_personal(
+                            response.content.decode(response.charset),
+                            fragments, request
+                        )
+                    return response
+                entry = (
+                    split_personal(
+                        response.content.decode(response.charset),
+                        response.charset
+                    ),
+                    response['Content-Type'],
+                    response.charset,
+                )
+                cache.set(key, entry, timeout)
+            parts, content_type, charset = entry
+            chunks = join_personal(parts, charset, request)
+            response = HttpResponse(
+                b''.join(raw for raw, deflated in chunks),
+                content_type=content_type
+            )
+            response.gzip_chunks = chunks
+            patch_cache_control(response, private=True, max_age=timeout)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,54 @@
+import gzip
+import re
+import struct
+import zlib
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_HEADER = b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x02\xff'
+FINAL_BLOCK = zlib.compressobj(wbits=-15).flush()
+
+
+def accepts(request, encoding):
+    accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    return re.search(rf'\b{encoding}\b', accept_encoding) is not None
+
+
+def deflate(data):
+    """Сжимает кусок так, чтобы его можно было склеить с другими.
+
+    Поток deflate без заголовка сбрасывается через Z_SYNC_FLUSH:
+    кусок кончается на границе байта и не помечен последним,
+    поэтому куски, сжатые по отдельности, образуют один поток.
+    """
+    compressor = zlib.compressobj(settings.COMPRESS_LEVEL, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+def gzip_join(chunks):
+    """Собирает gzip из кусков (исходные байты, сжатые байты).
+
+    Куски без сжатой версии (None) сжимаются здесь же, поэтому
+    заранее сжатые общие части страницы не сжимаются повторно.
+    """
+    crc = 0
+    size = 0
+    body = [GZIP_HEADER]
+    for raw, deflated in chunks:
+        crc = zlib.crc32(raw, crc)
+        size += len(raw)
+        body.append(deflate(raw) if deflated is None else deflated)
+    body.append(FINAL_BLOCK)
+    body.append(struct.pack('<II', crc, size & 0xffffffff))
+    return b''.join(body)
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content)
+    return gzip.compress(content, compresslevel=settings.COMPRESS_LEVEL)
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.backfill import BACKFILLS, run_backfill
+
+
+class Command(BaseCommand):
+    help = 'Дозаполняет данные большой таблицы диапазонами id.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'name', nargs='?',
+            help='Имя дозаполнения; без него выводится список.'
+        )
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument(
+            '--sleep', type=float,
+            help='Пауза в секундах между диапазонами.'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать сначала, а не с сохраненной точки.'
+        )
+
+    def handle(self, *args, **options):
+        if options['name'] is None:
+            for name in sorted(BACKFILLS):
+                self.stdout.write(name)
+            return
+        func = BACKFILLS.get(options['name'])
+        if func is None:
+            raise CommandError(f'Неизвестное дозаполнение {options["name"]}')
+        checkpoint = run_backfill(
+            func,
+            batch_size=options['batch_size'],
+            sleep=options['sleep'],
+            restart=options['restart']
+        )
+        self.stdout.write(
+            f'{checkpoint.name}: обработано до id {checkpoint.last_pk}, '
+            f'изменено строк {checkpoint.processed}'
+        )
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.tasks import get_broker
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди DatabaseBroker.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и завершиться.'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=1,
+            help='Пауза в секундах, если очередь пуста.'
+        )
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        broker = get_broker()
+        while True:
+            done = broker.process(options['batch_size'])
+            if done:
+                self.stdout.write(f'Выполнено задач: {done}')
+            if options['once']:
+                broker.cleanup()
+                break
+            if not done:
+                broker.cleanup()
+                time.sleep(options['sleep'])
@@ -0,0 +1,124 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .compression import accepts, brotli, compress, gzip_join
+from .staticfiles import static_path
+
+ENCODINGS = (('.br', 'br'), ('.gz', 'gzip'))
+
+
+class StaticFileResponse(FileResponse):
+    """FileResponse, который не угадывает заголовки по имени файла:
+    у сжатой копии style.css.gz тип остается типом исходного файла."""
+
+    def set_headers(self, filelike):
+        self['Content-Length'] = os.fstat(filelike.fileno()).st_size
+
+
+class StaticFilesMiddleware:
+    """Отдает собранную статику из STATIC_ROOT до сессий и views.
+
+    Если клиент принимает сжатие, отдается заранее сжатая копия
+    файла. Файлы с хешем в имени кешируются браузером навсегда:
+    при изменении содержимого у них меняется и адрес.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.immutable = {
+            hashed_name
+            for name, hashed_name in staticfiles_storage.hashed_files.items()
+            if name != hashed_name
+        }
+
+    def __call__(self, request):
+        if (
+            settings.STATIC_SERVE
+            and request.method in ('GET', 'HEAD')
+            and request.path.startswith(self.prefix)
+        ):
+            response = self.serve(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        path = static_path(name)
+        if path is None:
+            return None
+        stat = os.stat(path)
+        if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            stat.st_mtime, stat.st_size
+        ):
+            return HttpResponseNotModified()
+        content_type, _ = mimetypes.guess_type(path)
+        encoding = None
+        for suffix, candidate in ENCODINGS:
+            if accepts(request, candidate) and os.path.isfile(path + suffix):
+                path, encoding = path + suffix, candidate
+                break
+        response = StaticFileResponse(
+            open(path, 'rb'),
+            content_type=content_type or 'application/octet-stream'
+        )
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if encoding:
+            response['Content-Encoding'] = encoding
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if name in self.immutable:
+            patch_cache_control(
+                response, public=True, immutable=True,
+                max_age=settings.STATIC_MAX_AGE
+            )
+        else:
+            patch_cache_control(response, no_cache=True)
+        return response
+
+
+class CompressionMiddleware:
+    """Сжимает ответы, если клиент это принимает.
+
+    Страницы из общего кеша (shared_cache_page) несут заранее сжатые
+    общие куски, и gzip для них собирается без повторного сжатия.
+    Остальные ответы сжимаются brotli, если он установлен, или gzip.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or len(response.content) < settings.COMPRESS_MIN_SIZE
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        chunks = getattr(response, 'gzip_chunks', None)
+        if chunks is not None and accepts(request, 'gzip'):
+            encoding, content = 'gzip', gzip_join(chunks)
+        elif brotli is not None and accepts(request, 'br'):
+            encoding, content = 'br', compress(response.content, 'br')
+        elif accepts(request, 'gzip'):
+            encoding, content = 'gzip', compress(response.content, 'gzip')
+        else:
+            return response
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
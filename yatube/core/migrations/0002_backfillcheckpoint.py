@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackfillCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True, verbose_name='Дозаполнение')),
+                ('last_pk', models.BigIntegerField(default=0, verbose_name='Обработано до id')),
+                ('max_pk', models.BigIntegerField(blank=True, null=True, verbose_name='Последний id')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Изменено строк')),
+                ('started', models.DateTimeField(auto_now_add=True, verbose_name='Начато')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Завершено')),
+            ],
+            options={
+                'verbose_name': 'Ход дозаполнения',
+            },
+        ),
+    ]
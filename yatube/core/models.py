@@ -0,0 +1,61 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    ]
+
+    name = models.CharField('Задача', max_length=200)
+    args = models.TextField('Аргументы', default='[]')
+    key = models.CharField(
+        'Ключ идемпотентности',
+        max_length=200,
+        unique=True,
+        null=True,
+        blank=True
+    )
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING
+    )
+    attempts = models.PositiveIntegerField('Попытки', default=0)
+    run_at = models.DateTimeField('Запустить после', default=timezone.now)
+    locked_at = models.DateTimeField('Взята в работу', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
+
+    class Meta:
+        indexes = [models.Index(
+            fields=['status', 'run_at'], name='task_status_run_at_idx'),
+        ]
+        verbose_name = 'Фоновая задача'
+
+
+class BackfillCheckpoint(models.Model):
+    name = models.CharField('Дозаполнение', max_length=200, unique=True)
+    last_pk = models.BigIntegerField('Обработано до id', default=0)
+    max_pk = models.BigIntegerField('Последний id', null=True, blank=True)
+    processed = models.PositiveIntegerField('Изменено строк', default=0)
+    started = models.DateTimeField('Начато', auto_now_add=True)
+    updated = models.DateTimeField('Обновлено', auto_now=True)
+    finished = models.DateTimeField('Завершено', null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.name}: {self.last_pk}/{self.max_pk}'
+
+    class Meta:
+        verbose_name = 'Ход дозаполнения'
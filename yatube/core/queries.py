@@ -0,0 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.paginator import Page
+from django.db import close_old_connections, connection
+from django.db.models.query import QuerySet
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.QUERY_THREADS, thread_name_prefix='queries')
+
+
+def evaluate(result):
+    """Выполняет ленивый запрос, чтобы он не ушел в шаблон."""
+    if isinstance(result, QuerySet):
+        return list(result)
+    if isinstance(result, Page):
+        result.object_list = list(result.object_list)
+    return result
+
+
+def run_in_thread(query):
+    close_old_connections()
+    try:
+        return evaluate(query())
+    finally:
+        close_old_connections()
+
+
+def fetch_concurrently(**queries):
+    """Выполняет независимые запросы одновременно и возвращает словарь
+    результатов с теми же ключами.
+
+    Каждый поток пула работает со своим соединением с базой. Внутри
+    транзакции другие соединения не видят ее изменений, поэтому там
+    запросы выполняются по очереди в текущем потоке.
+    """
+    if len(queries) < 2 or connection.in_atomic_block:
+        return {name: evaluate(query()) for name, query in queries.items()}
+    futures = {
+        name: executor.submit(run_in_thread, query)
+        for name, query in queries.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,70 @@
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .views import too_many_requests
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60)"""
+    limit, period = rate.split('/')
+    return int(limit), PERIODS[period]
+
+
+def client_key(request, key):
+    if key == 'user' and request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{request.META.get("REMOTE_ADDR", "")}'
+
+
+def increment(key, timeout):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)
+
+
+def hit(name, client, limit, period, now=None):
+    """Учитывает запрос и возвращает, через сколько секунд можно
+    повторить, или 0, если лимит не превышен.
+
+    Скользящее окно приближается двумя счетчиками соседних фиксированных
+    окон: счетчик прошлого окна учитывается с весом оставшейся его доли.
+    """
+    now = time.time() if now is None else now
+    window, elapsed = divmod(now, period)
+    key = f'ratelimit:{name}:{client}:{int(window)}'
+    current = increment(key, period * 2)
+    previous = cache.get(f'ratelimit:{name}:{client}:{int(window) - 1}', 0)
+    if previous * (period - elapsed) / period + current > limit:
+        return max(1, math.ceil(period - elapsed))
+    return 0
+
+
+def ratelimit(name, methods=('POST',)):
+    """Ограничивает частоту запросов к представлению.
+
+    Лимит и ключ (пользователь или IP) берутся из RATELIMITS[name],
+    при превышении возвращается ответ 429 с заголовком Retry-After.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            config = settings.RATELIMITS.get(name)
+            if (settings.RATELIMIT_ENABLED and config
+                    and request.method in methods):
+                rate, key = config
+                retry_after = hit(
+                    name, client_key(request, key), *parse_rate(rate))
+                if retry_after:
+                    return too_many_requests(request, retry_after)
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
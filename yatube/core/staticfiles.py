@@ -0,0 +1,79 @@
+import gzip
+import os
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSED_EXTENSIONS = (
+    '.css', '.js', '.svg', '.ico', '.txt', '.html', '.json', '.xml',
+)
+MIN_COMPRESS_SIZE = 256
+
+
+def compressors():
+    yield '.gz', lambda content: gzip.compress(content, compresslevel=9)
+    if brotli is not None:
+        yield '.br', brotli.compress
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем содержимого в имени и сжатыми копиями.
+
+    collectstatic кладет рядом с каждым текстовым файлом версии .gz
+    и, если установлен brotli, .br, чтобы не сжимать их на лету.
+    Файлы, которых нет в манифесте (например, до первого
+    collectstatic), отдаются по исходному имени вместо ошибки.
+    """
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            clean_name = urlsplit(unquote(name)).path.strip()
+            self.hashed_files[self.hash_key(clean_name)] = clean_name
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            return
+        processed_files = set()
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            yield name, hashed_name, processed
+            if isinstance(processed, Exception):
+                continue
+            processed_files.update((name, hashed_name))
+        for name in processed_files:
+            if name and name.endswith(COMPRESSED_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as original:
+            content = original.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        for suffix, compress in compressors():
+            compressed = compress(content)
+            if len(compressed) >= len(content):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+
+
+def static_path(name):
+    """Путь к собранному файлу статики или None, если его нет."""
+    path = os.path.normpath(os.path.join(settings.STATIC_ROOT, name))
+    if not path.startswith(os.path.join(settings.STATIC_ROOT, '')):
+        return None
+    if not os.path.isfile(path):
+        return None
+    return path
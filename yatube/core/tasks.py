@@ -0,0 +1,143 @@
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+def task(max_retries=3, retry_delay=30):
+    """Регистрирует функцию как фоновую задачу.
+
+    Аргументы задачи должны сериализоваться в JSON.
+    """
+    def decorator(func):
+        func.task_name = f'{func.__module__}.{func.__name__}'
+        func.max_retries = max_retries
+        func.retry_delay = retry_delay
+        TASKS[func.task_name] = func
+        return func
+    return decorator
+
+
+def get_broker():
+    return import_string(settings.TASK_BROKER)()
+
+
+def enqueue(func, *args, key=None, countdown=0):
+    """Ставит задачу в очередь. Задача с уже известным ключом
+    повторно не ставится."""
+    get_broker().enqueue(func.task_name, list(args), key, countdown)
+
+
+def enqueue_on_commit(func, *args, key=None, countdown=0):
+    """Ставит задачу в очередь после фиксации текущей транзакции."""
+    transaction.on_commit(
+        lambda: enqueue(func, *args, key=key, countdown=countdown)
+    )
+
+
+class ImmediateBroker:
+    """Выполняет задачи сразу в текущем процессе.
+
+    Подходит для тестов и разработки: ключи идемпотентности хранятся
+    в кеше, а исключения после всех повторов только пишутся в лог.
+    """
+
+    def enqueue(self, name, args, key=None, countdown=0):
+        if key is not None and not cache.add(
+                f'task_key:{key}', True, settings.TASK_KEY_TIMEOUT):
+            return
+        func = TASKS[name]
+        for attempt in range(func.max_retries + 1):
+            try:
+                func(*args)
+                return
+            except Exception:
+                logger.exception('Задача %s: попытка %s', name, attempt + 1)
+
+
+class DatabaseBroker:
+    """Хранит задачи в таблице Task, их выполняет команда run_tasks.
+
+    Подходит для нескольких процессов с общей базой.
+    """
+
+    def enqueue(self, name, args, key=None, countdown=0):
+        try:
+            with transaction.atomic():
+                Task.objects.create(
+                    name=name,
+                    args=json.dumps(args),
+                    key=key,
+                    run_at=timezone.now() + timedelta(seconds=countdown)
+                )
+        except IntegrityError:
+            logger.debug('Задача с ключом %s уже в очереди', key)
+
+    def claim(self, limit):
+        """Забирает готовые к запуску задачи. Задача достается тому
+        процессу, чей UPDATE первым сменил ее статус."""
+        now = timezone.now()
+        stale = now - timedelta(seconds=settings.TASK_LOCK_TIMEOUT)
+        Task.objects.filter(
+            status=Task.RUNNING, locked_at__lt=stale
+        ).update(status=Task.PENDING)
+        candidates = Task.objects.filter(
+            status=Task.PENDING, run_at__lte=now
+        ).order_by('run_at').values_list('pk', flat=True)[:limit]
+        claimed = []
+        for pk in candidates:
+            if Task.objects.filter(pk=pk, status=Task.PENDING).update(
+                    status=Task.RUNNING, locked_at=now):
+                claimed.append(pk)
+        return Task.objects.filter(pk__in=claimed)
+
+    def cleanup(self):
+        """Удаляет выполненные и упавшие задачи старше TASK_KEY_TIMEOUT.
+
+        После этого их ключи идемпотентности снова свободны, а таблица
+        не растет от задач с ключом на каждый интервал времени.
+        """
+        before = timezone.now() - timedelta(
+            seconds=settings.TASK_KEY_TIMEOUT)
+        deleted, _ = Task.objects.filter(
+            status__in=[Task.DONE, Task.FAILED], run_at__lt=before
+        ).delete()
+        return deleted
+
+    def process(self, limit=100):
+        """Выполняет одну порцию задач и возвращает их количество."""
+        tasks = list(self.claim(limit))
+        for item in tasks:
+            func = TASKS.get(item.name)
+            try:
+                if func is None:
+                    raise LookupError(f'Неизвестная задача {item.name}')
+                func(*json.loads(item.args))
+            except Exception:
+                item.attempts += 1
+                item.last_error = traceback.format_exc()
+                max_retries = getattr(func, 'max_retries', 0)
+                if item.attempts > max_retries:
+                    item.status = Task.FAILED
+                else:
+                    item.status = Task.PENDING
+                    item.run_at = timezone.now() + timedelta(
+                        seconds=func.retry_delay * item.attempts)
+            else:
+                item.status = Task.DONE
+            item.locked_at = None
+            item.save(update_fields=[
+                'status', 'attempts', 'last_error', 'run_at', 'locked_at'])
+        return len(tasks)
@@ -0,0 +1,56 @@
+import re
+
+from django.template.loaders import app_directories, filesystem
+
+PRESERVED_RE = re.compile(
+    r'<(pre|textarea|script|style)\b.*?</\1\s*>|{%.*?%}|{{.*?}}|{#.*?#}',
+    re.DOTALL | re.IGNORECASE
+)
+COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+WHITESPACE_RE = re.compile(r'\s+')
+EXCLUDED_PREFIXES = ('registration/',)
+
+
+def collapse(html):
+    html = COMMENT_RE.sub('', html)
+    return WHITESPACE_RE.sub(
+        lambda match: '\n' if '\n' in match.group() else ' ', html)
+
+
+def minify(source):
+    """Убирает из исходника шаблона отступы и HTML-комментарии.
+
+    Серии пробельных символов сжимаются до одного, содержимое
+    <pre>, <textarea>, <script>, <style> и тегов шаблона не меняется.
+    """
+    parts = []
+    position = 0
+    for match in PRESERVED_RE.finditer(source):
+        parts.append(collapse(source[position:match.start()]))
+        parts.append(match.group())
+        position = match.end()
+    parts.append(collapse(source[position:]))
+    return ''.join(parts)
+
+
+class MinifyMixin:
+    """Минифицирует HTML-шаблон один раз при загрузке исходника.
+
+    Письма из registration/ и не-HTML шаблоны не трогаются:
+    в тексте писем переводы строк значимы.
+    """
+
+    def get_contents(self, origin):
+        contents = super().get_contents(origin)
+        name = origin.template_name or ''
+        if not name.endswith('.html') or name.startswith(EXCLUDED_PREFIXES):
+            return contents
+        return minify(contents)
+
+
+class FilesystemLoader(MinifyMixin, filesystem.Loader):
+    pass
+
+
+class AppDirectoriesLoader(MinifyMixin, app_directories.Loader):
+    pass
@@ -0,0 +1,22 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.cache import PLACEHOLDER
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def personal(context, template_name):
+    """Подключает фрагмент страницы, который зависит от пользователя.
+
+    Если страница рендерится для общего кеша, вместо фрагмента
+    выводится метка, которую потом заполнит shared_cache_page.
+    """
+    fragments = getattr(context.get('request'), 'personal_fragments', None)
+    if fragments is not None:
+        fragments.add(template_name)
+        return mark_safe(PLACEHOLDER.format(template_name))
+    fragment = context.template.engine.get_template(template_name)
+    with context.push():
+        return fragment.render(context)
@@ -0,0 +1,46 @@
+import asyncio
+
+from django.core.wsgi import get_wsgi_application
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from core.asgi import WsgiToAsgi
+
+
+class WsgiToAsgiTests(SimpleTestCase):
+
+    def request(self, path, query_string=b''):
+        application = WsgiToAsgi(get_wsgi_application(), max_workers=2)
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': query_string,
+            'headers': [(b'host', b'testserver')],
+            'server': ('testserver', 80),
+            'client': ('127.0.0.1', 5000),
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(application(scope, receive, send))
+        return messages
+
+    def test_page_served_over_asgi(self):
+        """Страница отдается через ASGI-приложение."""
+        messages = self.request(reverse('about:author'))
+        self.assertEqual(messages[0]['type'], 'http.response.start')
+        self.assertEqual(messages[0]['status'], 200)
+        body = b''.join(message.get('body', b'') for message in messages[1:])
+        self.assertIn('Об авторе'.encode(), body)
+        self.assertFalse(messages[-1].get('more_body'))
+
+    def test_unknown_page_over_asgi(self):
+        """Несуществующая страница возвращает 404."""
+        messages = self.request('/unexisting_page/', b'page=2')
+        self.assertEqual(messages[0]['status'], 404)
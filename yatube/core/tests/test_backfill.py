@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core.backfill import backfill, run_backfill
+from core.models import BackfillCheckpoint
+from posts.backfills import comment_replies_count
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+SEEN = []
+
+
+@backfill(Post, batch_size=2, sleep=0)
+def remember_posts(posts):
+    SEEN.append(sorted(posts.values_list('pk', flat=True)))
+    return len(SEEN[-1])
+
+
+class BackfillTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='backfiller')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=str(number))
+            for number in range(5)
+        ]
+
+    def setUp(self):
+        SEEN.clear()
+
+    def test_resume_from_checkpoint(self):
+        """Прерванное дозаполнение продолжается со следующего
+        диапазона id, а новые строки не обрабатываются."""
+        ids = [post.pk for post in self.posts]
+        checkpoint = run_backfill(remember_posts, limit=1)
+        self.assertEqual(checkpoint.last_pk, ids[0] + 1)
+        self.assertIsNone(checkpoint.finished)
+        Post.objects.create(author=self.user, text='новый')
+        checkpoint = run_backfill(remember_posts)
+        self.assertEqual(sum(SEEN, []), ids)
+        self.assertEqual(checkpoint.processed, 5)
+        self.assertIsNotNone(
+            BackfillCheckpoint.objects.get(name=checkpoint.name).finished)
+
+    def test_comment_replies_count(self):
+        """Дозаполнение пересчитывает число ответов комментариев."""
+        root = Comment.objects.create(
+            post=self.posts[0], author=self.user, text='корень')
+        Comment.objects.create(
+            post=self.posts[0], author=self.user, text='ответ', parent=root)
+        Comment.objects.filter(pk=root.pk).update(replies_count=0)
+        checkpoint = run_backfill(comment_replies_count, sleep=0)
+        self.assertEqual(checkpoint.processed, 1)
+        root.refresh_from_db()
+        self.assertEqual(root.replies_count, 1)
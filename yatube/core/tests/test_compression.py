@@ -0,0 +1,55 @@
+import gzip
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import compression
+from posts.models import Post
+
+User = get_user_model()
+
+
+class CompressionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='gzip_reader')
+        Post.objects.create(author=cls.user, text='общий текст ' * 50)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_cached_page_spliced_without_recompression(self):
+        """Страница из общего кеша отдается в gzip, общие куски
+        не сжимаются повторно, а персональные подставлены верно."""
+        address = reverse('posts:index')
+        self.client.get(address)
+        plain = self.authorized_client.get(address).content
+        with mock.patch.object(
+            compression, 'deflate', wraps=compression.deflate
+        ) as deflate:
+            response = self.authorized_client.get(
+                address, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain)
+        self.assertIn('gzip_reader', plain.decode())
+        personal_count = len(response.gzip_chunks) // 2
+        self.assertEqual(deflate.call_count, personal_count)
+
+    def test_uncached_page_compressed(self):
+        """Обычная страница тоже сжимается, а без Accept-Encoding
+        отдается как есть."""
+        address = reverse('posts:profile', args=(self.user.username,))
+        response = self.client.get(address, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(response.content),
+            self.client.get(address).content
+        )
+        self.assertFalse(self.client.get(address).has_header(
+            'Content-Encoding'))
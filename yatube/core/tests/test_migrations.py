@@ -0,0 +1,36 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from posts.models import Follow, Post
+
+
+class MigrationsTests(TestCase):
+
+    def test_no_missing_migrations(self):
+        """Миграции описывают все изменения моделей."""
+        out = StringIO()
+        try:
+            call_command(
+                'makemigrations', check=True, dry_run=True, stdout=out)
+        except SystemExit:
+            self.fail(f'Модели расходятся с миграциями:\n{out.getvalue()}')
+
+    def test_indexes_and_constraints_created(self):
+        """База, собранная миграциями, содержит индексы и ограничения,
+        на которые рассчитаны запросы лент."""
+        with connection.cursor() as cursor:
+            post_constraints = connection.introspection.get_constraints(
+                cursor, Post._meta.db_table)
+            follow_constraints = connection.introspection.get_constraints(
+                cursor, Follow._meta.db_table)
+        for index in Post._meta.indexes:
+            with self.subTest(index=index.name):
+                self.assertIn(index.name, post_constraints)
+        self.assertTrue(any(
+            constraint['index'] and constraint['columns'] == ['pub_date']
+            for constraint in post_constraints.values()
+        ))
+        self.assertTrue(follow_constraints['unique_following']['unique'])
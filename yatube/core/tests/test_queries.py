@@ -0,0 +1,41 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase
+
+from core.queries import fetch_concurrently
+
+User = get_user_model()
+
+
+def current_thread():
+    return threading.current_thread().name
+
+
+class FetchConcurrentlyTests(TransactionTestCase):
+
+    def test_queries_run_in_pool(self):
+        """Независимые запросы выполняются в потоках пула."""
+        User.objects.create_user(username='reader')
+        results = fetch_concurrently(
+            users=lambda: User.objects.values_list('username', flat=True),
+            count=User.objects.count,
+            thread=current_thread,
+        )
+        self.assertEqual(results['users'], ['reader'])
+        self.assertEqual(results['count'], 1)
+        self.assertTrue(results['thread'].startswith('queries'))
+
+
+class FetchInTransactionTests(TestCase):
+
+    def test_queries_run_in_current_thread(self):
+        """Внутри транзакции запросы выполняются в текущем потоке
+        и видят ее изменения."""
+        User.objects.create_user(username='reader')
+        results = fetch_concurrently(
+            count=User.objects.count,
+            thread=current_thread,
+        )
+        self.assertEqual(results['count'], 1)
+        self.assertEqual(results['thread'], current_thread())
@@ -0,0 +1,44 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.ratelimit import hit
+
+User = get_user_model()
+
+
+class RateLimitTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='spammer')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_sliding_window(self):
+        """Прошлое окно учитывается пропорционально оставшейся доле."""
+        for _ in range(4):
+            self.assertEqual(hit('test', 'client', 4, 60, now=6000), 0)
+        self.assertEqual(hit('test', 'client', 4, 60, now=6030), 30)
+        self.assertEqual(hit('test', 'client', 4, 60, now=6119), 0)
+
+    @override_settings(RATELIMITS={'add_comment': ('1/m', 'user')})
+    def test_view_returns_429(self):
+        """При превышении лимита возвращается 429 с Retry-After."""
+        author = User.objects.create_user(username='author')
+        post = author.posts.create(text='Пост')
+        address = reverse('posts:add_comment', args=(post.id,))
+        response = self.authorized_client.post(address, {'text': 'раз'})
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.authorized_client.post(address, {'text': 'два'})
+        self.assertEqual(
+            response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertTrue(int(response['Retry-After']) > 0)
+        self.assertTemplateUsed(response, 'core/429.html')
+        self.assertEqual(post.comments.count(), 1)
@@ -0,0 +1,71 @@
+import gzip
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import TestCase, override_settings
+
+STYLE = b'body { color: black; }\n' * 50
+PAGE = b'<p>offline</p>\n' * 50
+
+SOURCE_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(
+    STATICFILES_DIRS=[SOURCE_DIR],
+    STATIC_ROOT=TEMP_STATIC_ROOT,
+    STATICFILES_FINDERS=[
+        'django.contrib.staticfiles.finders.FileSystemFinder'],
+)
+class StaticFilesTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with open(f'{SOURCE_DIR}/style.css', 'wb') as style:
+            style.write(STYLE)
+        with open(f'{SOURCE_DIR}/offline.html', 'wb') as page:
+            page.write(PAGE)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(SOURCE_DIR, ignore_errors=True)
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_missing_manifest_falls_back_to_name(self):
+        """Файл, которого нет в манифесте, адресуется по исходному
+        имени."""
+        self.assertEqual(static('css/missing.css'), '/static/css/missing.css')
+
+    def test_hashed_file_served_compressed(self):
+        """Собранный файл получает хеш в имени, отдается сжатым
+        и кешируется навсегда."""
+        call_command('collectstatic', interactive=False, verbosity=0)
+        url = static('style.css')
+        self.assertRegex(url, r'^/static/style\.[0-9a-f]{12}\.css$')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)), STYLE)
+        response = self.client.get('/static/style.css')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertEqual(b''.join(response.streaming_content), STYLE)
+
+    def test_compressed_copy_keeps_original_headers(self):
+        """Сжатая копия отдается с типом исходного файла и без
+        имени .gz в заголовках."""
+        call_command('collectstatic', interactive=False, verbosity=0)
+        response = self.client.get(
+            static('offline.html'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/html')
+        self.assertNotIn('Content-Disposition', response)
+        content = b''.join(response.streaming_content)
+        self.assertEqual(int(response['Content-Length']), len(content))
+        self.assertEqual(gzip.decompress(content), PAGE)
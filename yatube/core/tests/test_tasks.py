@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core.models import Task
+from core.tasks import DatabaseBroker, enqueue, enqueue_on_commit, task
+
+CALLS = []
+
+
+@task(max_retries=1, retry_delay=0)
+def remember(value):
+    CALLS.append(value)
+
+
+@task(max_retries=1, retry_delay=0)
+def explode():
+    raise ValueError('boom')
+
+
+@override_settings(TASK_BROKER='core.tasks.DatabaseBroker')
+class DatabaseBrokerTests(TestCase):
+
+    def setUp(self):
+        CALLS.clear()
+
+    def test_task_runs_once_per_key(self):
+        """Задача с одним ключом попадает в очередь один раз."""
+        enqueue(remember, 1, key='remember:1')
+        enqueue(remember, 1, key='remember:1')
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertEqual(DatabaseBroker().process(), 1)
+        self.assertEqual(CALLS, [1])
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+
+    def test_failed_task_is_retried(self):
+        """Упавшая задача повторяется, а после всех попыток
+        помечается ошибкой."""
+        enqueue(explode)
+        broker = DatabaseBroker()
+        broker.process()
+        self.assertEqual(Task.objects.get().status, Task.PENDING)
+        broker.process()
+        failed = Task.objects.get()
+        self.assertEqual(failed.status, Task.FAILED)
+        self.assertEqual(failed.attempts, 2)
+        self.assertIn('boom', failed.last_error)
+
+    def test_cleanup_removes_old_finished_tasks(self):
+        """Старые выполненные задачи удаляются, а их ключ снова
+        можно поставить в очередь."""
+        enqueue(remember, 4, key='remember:4')
+        enqueue(remember, 5)
+        broker = DatabaseBroker()
+        broker.process()
+        enqueue(remember, 6)
+        Task.objects.update(run_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(broker.cleanup(), 2)
+        self.assertEqual(Task.objects.get().status, Task.PENDING)
+        enqueue(remember, 4, key='remember:4')
+        self.assertEqual(Task.objects.count(), 2)
+
+
+@override_settings(TASK_BROKER='core.tasks.ImmediateBroker')
+class EnqueueOnCommitTests(TransactionTestCase):
+
+    def setUp(self):
+        CALLS.clear()
+        cache.clear()
+
+    def test_task_waits_for_commit(self):
+        """Задача выполняется только после фиксации транзакции."""
+        with transaction.atomic():
+            enqueue_on_commit(remember, 2, key='remember:2')
+            self.assertEqual(CALLS, [])
+        self.assertEqual(CALLS, [2])
+
+    def test_task_dropped_on_rollback(self):
+        """При откате транзакции задача не ставится."""
+        try:
+            with transaction.atomic():
+                enqueue_on_commit(remember, 3)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(CALLS, [])
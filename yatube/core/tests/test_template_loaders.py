@@ -0,0 +1,52 @@
+import copy
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.template_loaders import minify
+from posts.models import Post
+
+User = get_user_model()
+
+MINIFIED_TEMPLATES = copy.deepcopy(settings.TEMPLATES)
+MINIFIED_TEMPLATES[0]['APP_DIRS'] = False
+MINIFIED_TEMPLATES[0]['OPTIONS']['loaders'] = [
+    'core.template_loaders.FilesystemLoader',
+    'core.template_loaders.AppDirectoriesLoader',
+]
+
+
+class MinifyTests(TestCase):
+
+    def test_minify_keeps_preformatted_and_tags(self):
+        """Отступы убираются, а <pre> и теги шаблона остаются
+        как были."""
+        source = (
+            '<ul>\n    <li>  {{ post.text|linebreaksbr }}  </li>\n</ul>\n'
+            '<!-- комментарий -->\n'
+            '<pre>\n  код\n    с отступом</pre>\n'
+            '{% if a  and b %}\n\n    да{% endif %}'
+        )
+        self.assertEqual(
+            minify(source),
+            '<ul>\n<li> {{ post.text|linebreaksbr }} </li>\n</ul>\n'
+            '<pre>\n  код\n    с отступом</pre>\n'
+            '{% if a  and b %}\nда{% endif %}'
+        )
+
+    def test_minified_page_is_smaller(self):
+        """Страница с минифицированными шаблонами меньше, а ее текст
+        совпадает с обычной."""
+        user = User.objects.create_user(username='minify_author')
+        Post.objects.create(author=user, text='первая строка\nвторая')
+        address = reverse('posts:profile', args=(user.username,))
+        plain = self.client.get(address).content.decode()
+        cache.clear()
+        with override_settings(TEMPLATES=MINIFIED_TEMPLATES):
+            minified = self.client.get(address).content.decode()
+        self.assertLess(len(minified), len(plain))
+        self.assertIn('первая строка<br>вторая', minified)
+        self.assertEqual(minified.split(), plain.split())
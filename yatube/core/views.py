@@ -15,3 +15,12 @@ def csrf_failure(request, reason=''):
 
 def internal_server_error(request, reason=''):
     return render(request, 'core/500.html')
+
+
+def too_many_requests(request, retry_after):
+    response = render(
+        request, 'core/429.html', {'retry_after': retry_after},
+        status=HTTPStatus.TOO_MANY_REQUESTS
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
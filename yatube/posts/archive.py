@@ -0,0 +1,119 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from . import group_stats
+from .counts import stored_count
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Post, PostCounter
+)
+from .utils import encode_cursor, keyset_page
+
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'author_id', 'group_id', 'image', 'status',
+    'deleted_at',
+)
+COMMENT_FIELDS = (
+    'id', 'post_id', 'parent_id', 'path', 'depth', 'replies_count',
+    'created', 'author_id', 'text',
+)
+
+
+def copy_fields(instance, fields):
+    return {field: getattr(instance, field) for field in fields}
+
+
+def archive_batch(before=None, batch_size=None):
+    """Переносит пачку постов старше before вместе с комментариями
+    в архивные таблицы и удаляет их из Post и Comment.
+
+    Черновики и запланированные посты не архивируются. Счетчики
+    постов уменьшают сигналы удаления: они считают только
+    горячую таблицу. В статистике групп архивные посты остаются.
+    Возвращает число перенесенных постов.
+    """
+    before = before or timezone.now() - timedelta(
+        days=settings.ARCHIVE_AFTER_DAYS)
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    with transaction.atomic():
+        posts = list(Post.objects.filter(
+            pub_date__lt=before,
+            status__in=[Post.PUBLISHED, Post.DELETED]
+        ).order_by('pub_date')[:batch_size])
+        if not posts:
+            return 0
+        ArchivedPost.objects.bulk_create([
+            ArchivedPost(**copy_fields(post, POST_FIELDS)) for post in posts
+        ])
+        ArchivedComment.objects.bulk_create([
+            ArchivedComment(**copy_fields(comment, COMMENT_FIELDS))
+            for comment in Comment.objects.filter(
+                post__in=posts).order_by('path')
+        ])
+        Post.objects.filter(pk__in=[post.pk for post in posts]).delete()
+        published = [
+            post for post in posts if post.group_id and post.is_published]
+        last_post_at = {post.group_id: post.pub_date for post in published}
+        groups = Counter(post.group_id for post in published)
+        for group_id, count in groups.items():
+            group_stats.add_posts(group_id, count, last_post_at[group_id])
+    return len(posts)
+
+
+def author_posts_count(author_id):
+    return stored_count(
+        PostCounter.AUTHOR, author_id
+    ) + ArchivedPost.objects.published().filter(author_id=author_id).count()
+
+
+class ArchiveChain:
+    """Посты автора для Paginator: сначала горячие, за ними архивные.
+
+    Обе выборки отсортированы по дате, а архивные посты старше
+    горячих, поэтому срез страницы читает одну или две таблицы.
+    """
+
+    def __init__(self, posts, archived_posts, posts_count):
+        self.posts = posts
+        self.archived_posts = archived_posts
+        self.posts_count = posts_count
+
+    @cached_property
+    def hot_count(self):
+        return self.posts_count()
+
+    def count(self):
+        return self.hot_count + self.archived_posts.count()
+
+    def __getitem__(self, index):
+        start, stop = index.start or 0, index.stop
+        items = []
+        if start < self.hot_count:
+            items.extend(self.posts[start:stop])
+        if stop > self.hot_count:
+            items.extend(self.archived_posts[
+                max(start - self.hot_count, 0):stop - self.hot_count])
+        return items
+
+
+def keyset_chain(posts, archived_posts, cursor=None):
+    """Порция бесконечной ленты: горячие посты, за ними архивные.
+
+    Курсор хранит дату и id последнего поста, поэтому он подходит
+    для обеих таблиц: когда горячие посты кончаются, порция
+    добирается архивными после последнего показанного поста.
+    """
+    items, next_cursor = keyset_page(posts, cursor)
+    if next_cursor is not None:
+        return items, next_cursor
+    size = settings.VIEW_POST_NUMBER - len(items)
+    if items:
+        cursor = encode_cursor(items[-1], 'pub_date')
+    more, next_cursor = keyset_page(archived_posts, cursor, size=size or 1)
+    if not size:
+        return items, cursor if more else None
+    return items + more, next_cursor
@@ -0,0 +1,29 @@
+from django.db.models import Count
+
+from core.backfill import backfill
+
+from .models import Comment, Post
+from .tasks import enqueue_thumbnail
+
+
+@backfill(Comment)
+def comment_replies_count(comments):
+    """Пересчитывает replies_count комментариев по их ответам."""
+    changed = [
+        comment
+        for comment in comments.annotate(replies_total=Count('replies'))
+        if comment.replies_count != comment.replies_total
+    ]
+    for comment in changed:
+        comment.replies_count = comment.replies_total
+    Comment.objects.bulk_update(changed, ['replies_count'])
+    return len(changed)
+
+
+@backfill(Post, batch_size=200)
+def post_thumbnails(posts):
+    """Ставит в очередь миниатюры картинок старых постов."""
+    posts = list(posts.exclude(image='').only('image'))
+    for post in posts:
+        enqueue_thumbnail(post)
+    return len(posts)
@@ -0,0 +1,172 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+from core.ratelimit import increment
+from core.tasks import enqueue, task
+
+from .models import Comment, PendingComment, Post
+
+logger = logging.getLogger(__name__)
+
+
+def is_hot(post_id):
+    """Пост горячий, если за текущую секунду к нему пришло больше
+    COMMENT_HOT_THRESHOLD комментариев."""
+    second = int(time.time())
+    return increment(f'comment_rate:{post_id}:{second}', 2) > (
+        settings.COMMENT_HOT_THRESHOLD)
+
+
+def post_exists(post_id):
+    """Пост опубликован и его можно комментировать."""
+    return cache.get_or_set(
+        f'post_exists:{post_id}',
+        lambda: Post.objects.published().filter(pk=post_id).exists(),
+        settings.CACHE_NUMBER
+    )
+
+
+def forget_post(post_id):
+    cache.delete(f'post_exists:{post_id}')
+
+
+class CommentBuffer:
+    """Буфер комментариев к горячим постам в общем кеше.
+
+    Время делится на окна по COMMENT_BATCH_DELAY секунд. Запрос кладет
+    комментарий в очередной слот своего окна и только первый запрос
+    окна ставит задачу flush_comments, поэтому в базу запрос не пишет.
+    Задача запускается после конца окна и сохраняет все его
+    комментарии в одной транзакции. Если кеш недоступен, комментарий
+    пишется в таблицу PendingComment, ее разбирает та же задача.
+    """
+
+    def add(self, comment):
+        """Кладет комментарий в буфер и возвращает ключ его слота
+        или None, если комментарий ушел в таблицу."""
+        if not comment.path:
+            comment.fill_path()
+        item = {
+            'post_id': comment.post_id,
+            'author_id': comment.author_id,
+            'text': comment.text,
+            'path': comment.path,
+            'created': timezone.now(),
+        }
+        delay = settings.COMMENT_BATCH_DELAY
+        window = int(time.time() / delay) if delay else time.time()
+        timeout = settings.COMMENT_BUFFER_TIMEOUT
+        try:
+            slot = increment(f'comment_buffer:{window}', timeout)
+            key = f'comment_buffer:{window}:{slot}'
+            cache.set(key, item, timeout)
+            scheduled = not cache.add(
+                f'flush_comments:{window}', True, timeout)
+        except Exception:
+            logger.exception('Буфер комментариев недоступен')
+            PendingComment.objects.create(**item)
+            key, scheduled = None, False
+        if not scheduled:
+            countdown = (window + 2) * delay - time.time() if delay else 0
+            enqueue(flush_comments, window,
+                    key=f'flush_comments:{window}', countdown=countdown)
+        return key
+
+    def pending(self, post_id, author_id, keys):
+        """Еще не сохраненные комментарии автора к посту по ключам
+        слотов из его сессии, чтобы он видел их сразу после отправки."""
+        items = [
+            item for item in cache.get_many(filter(None, keys)).values()
+            if item['post_id'] == post_id and item['author_id'] == author_id
+        ]
+        items += PendingComment.objects.filter(
+            post_id=post_id, author_id=author_id
+        ).values('post_id', 'author_id', 'text', 'path', 'created')
+        items.sort(key=lambda item: item['created'], reverse=True)
+        return [Comment(**item) for item in items]
+
+    def flush(self, window):
+        """Сохраняет комментарии окна и таблицы PendingComment
+        и возвращает их число.
+
+        Слоты удаляются из кеша после фиксации транзакции: если она
+        не прошла, задача повторится с теми же комментариями.
+        """
+        count = cache.get(f'comment_buffer:{window}', 0)
+        keys = [f'comment_buffer:{window}:{slot}'
+                for slot in range(1, count + 1)]
+        batch = cache.get_many(keys)
+        saved = list(batch)
+        try:
+            with transaction.atomic():
+                self.save(batch.values())
+        except Exception:
+            logger.exception('Пачка из %s комментариев не сохранилась',
+                             len(batch))
+            saved = [key for key, item in batch.items()
+                     if self.save_one(item)]
+        cache.delete_many(saved)
+        return len(saved) + self.flush_table()
+
+    def flush_table(self):
+        """Переносит в Comment комментарии, записанные в таблицу
+        при недоступном кеше, одной транзакцией с их удалением."""
+        with transaction.atomic():
+            rows = list(PendingComment.objects.select_for_update(
+                skip_locked=True).order_by('pk'))
+            if rows:
+                self.save(vars(row) for row in rows)
+                PendingComment.objects.filter(
+                    pk__in=[row.pk for row in rows]).delete()
+        return len(rows)
+
+    def save(self, items):
+        """Сохраняет комментарии пачкой. Поле created заполняется
+        при вставке, поэтому время отправки ставится тем же UPDATE
+        для всей пачки."""
+        items = list(items)
+        if not items:
+            return
+        Comment.objects.bulk_create([
+            Comment(
+                post_id=item['post_id'],
+                author_id=item['author_id'],
+                text=item['text'],
+                path=item['path']
+            )
+            for item in items
+        ], batch_size=settings.COMMENT_BATCH_SIZE)
+        Comment.objects.filter(
+            post_id__in={item['post_id'] for item in items},
+            path__in=[item['path'] for item in items]
+        ).update(created=Case(
+            *[When(path=item['path'], then=Value(item['created']))
+              for item in items],
+            output_field=DateTimeField()
+        ))
+
+    def save_one(self, item):
+        """Сохраняет комментарий отдельно; не сохранившийся
+        остается в буфере до повтора задачи."""
+        try:
+            with transaction.atomic():
+                self.save([item])
+        except Exception:
+            logger.exception('Комментарий автора %s не сохранился',
+                             item['author_id'])
+            return False
+        return True
+
+
+comment_buffer = CommentBuffer()
+
+
+@task(retry_delay=1)
+def flush_comments(window):
+    comment_buffer.flush(window)
@@ -0,0 +1,113 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import Post, PostCounter
+
+GENERATION_KEY = 'post_count_generation'
+
+SCOPES = {
+    PostCounter.ALL: lambda object_id: Post.objects.published(),
+    PostCounter.AUTHOR: lambda object_id: Post.objects.published().filter(
+        author_id=object_id),
+    PostCounter.GROUP: lambda object_id: Post.objects.published().filter(
+        group_id=object_id),
+}
+
+
+def stored_count(scope, object_id=0):
+    """Число опубликованных постов всего, автора или группы
+    из PostCounter.
+
+    Счетчики создает миграция fill_post_counters и сигналы создания
+    пользователя и группы, дальше их поддерживают сигналы постов.
+    Счетчик не создается при чтении: пост, созданный между COUNT
+    и вставкой счетчика, навсегда сбил бы его на единицу. Если
+    счетчика нет, посты считаются запросом COUNT.
+    """
+    count = PostCounter.objects.filter(
+        scope=scope, object_id=object_id
+    ).values_list('count', flat=True).first()
+    if count is None:
+        count = SCOPES[scope](object_id).count()
+    return count
+
+
+def change_stored_counts(delta, author_id=None, group_id=None, total=True):
+    scopes = Q(scope=PostCounter.AUTHOR, object_id=author_id)
+    scopes |= Q(scope=PostCounter.GROUP, object_id=group_id)
+    if total:
+        scopes |= Q(scope=PostCounter.ALL)
+    PostCounter.objects.filter(scopes).update(count=F('count') + delta)
+
+
+def recount():
+    """Пересчитывает все счетчики запросами COUNT и возвращает
+    число исправленных.
+
+    Сигналы не видят изменений через QuerySet.update и сырой SQL,
+    поэтому команда recount_posts периодически сверяет счетчики
+    с базой. Счетчики блокируются до подсчета, поэтому пост,
+    созданный во время пересчета, не теряется.
+    """
+    fixed = 0
+    with transaction.atomic():
+        counters = list(PostCounter.objects.select_for_update())
+        published = Post.objects.published().order_by()
+        actual = {(PostCounter.ALL, 0): published.count()}
+        for scope, field in ((PostCounter.AUTHOR, 'author'),
+                             (PostCounter.GROUP, 'group')):
+            actual.update(
+                ((scope, object_id), count)
+                for object_id, count in published.values_list(
+                    field).annotate(Count('id'))
+            )
+        for counter in counters:
+            count = actual.get((counter.scope, counter.object_id), 0)
+            if counter.count != count:
+                PostCounter.objects.filter(pk=counter.pk).update(count=count)
+                fixed += 1
+    if fixed:
+        next_generation()
+    return fixed
+
+
+def generation():
+    cache.add(GENERATION_KEY, time.time_ns(), None)
+    return cache.get(GENERATION_KEY)
+
+
+def next_generation():
+    """Сбрасывает все закешированные числа постов разом."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        generation()
+
+
+def bounded_count(queryset, limit=None):
+    """Число постов, но не больше limit: база перестает считать,
+    дойдя до предела, и COUNT не проходит всю ленту."""
+    limit = limit or settings.COUNT_LIMIT
+    return queryset.order_by()[:limit].count()
+
+
+def cached_count(queryset):
+    """Ограниченное число постов ленты, закешированное до следующего
+    изменения любого поста."""
+    try:
+        sql = str(queryset.query)
+    except EmptyResultSet:
+        return 0
+    query = hashlib.md5(sql.encode()).hexdigest()
+    key = f'post_count:{generation()}:{query}'
+    count = cache.get(key)
+    if count is None:
+        count = bounded_count(queryset)
+        cache.set(key, count, settings.COUNT_CACHE_TIMEOUT)
+    return count
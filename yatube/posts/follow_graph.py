@@ -0,0 +1,62 @@
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+FOLLOWEES = 'followees'
+FOLLOWERS = 'followers'
+
+
+def graph_cache_key(kind, user_id):
+    return f'follow_graph:{kind}:{user_id}'
+
+
+def load_ids(kind, user_id):
+    """Возвращает отсортированный массив id авторов пользователя
+    или его подписчиков."""
+    key = graph_cache_key(kind, user_id)
+    data = cache.get(key)
+    ids = array('I')
+    if data is not None:
+        ids.frombytes(data)
+        return ids
+    if kind == FOLLOWEES:
+        rows = Follow.objects.filter(user_id=user_id).values_list(
+            'author_id', flat=True)
+    else:
+        rows = Follow.objects.filter(author_id=user_id).values_list(
+            'user_id', flat=True)
+    ids.extend(sorted(rows))
+    cache.set(key, ids.tobytes(), settings.FOLLOW_GRAPH_TIMEOUT)
+    return ids
+
+
+def followee_ids(user_id):
+    return load_ids(FOLLOWEES, user_id)
+
+
+def follower_ids(user_id):
+    return load_ids(FOLLOWERS, user_id)
+
+
+def contains(ids, value):
+    index = bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def forget_follows(user_id, author_ids):
+    """Сбрасывает массивы подписок пользователя и подписчиков
+    авторов после фиксации транзакции.
+
+    Откаченная подписка в кеш не попадает, а следующее чтение
+    загрузит массивы из базы вместе с изменениями параллельных
+    запросов, которые точечная правка могла бы перезаписать.
+    """
+    keys = [graph_cache_key(FOLLOWEES, user_id)] + [
+        graph_cache_key(FOLLOWERS, author_id) for author_id in author_ids
+    ]
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,37 @@
+from .follow_graph import contains, followee_ids
+
+
+class FollowState:
+    """Подписки пользователя на авторов, которые есть на странице.
+
+    Подписки на всех авторов страницы проверяются по одному массиву
+    из графа подписок (или одним запросом, если его нет в кеше)
+    и запоминаются до конца запроса.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.known = {}
+
+    def prefetch(self, author_ids):
+        if not self.user.is_authenticated:
+            return
+        author_ids = set(author_ids) - set(self.known)
+        if not author_ids:
+            return
+        followed = followee_ids(self.user.pk)
+        for author_id in author_ids:
+            self.known[author_id] = contains(followed, author_id)
+
+    def is_following(self, author_id):
+        if not self.user.is_authenticated:
+            return False
+        if author_id not in self.known:
+            self.prefetch([author_id])
+        return self.known[author_id]
+
+
+def get_follow_state(request):
+    if not hasattr(request, 'follow_state'):
+        request.follow_state = FollowState(request.user)
+    return request.follow_state
@@ -1,4 +1,5 @@
 from django import forms
+from django.utils import timezone
 
 from .models import Post, Comment
 
@@ -18,6 +19,44 @@ class PostForm(forms.ModelForm):
         }
 
 
+class PublicationForm(forms.ModelForm):
+    """Статус и время публикации поста.
+
+    Отдельно от PostForm, чтобы форма текста поста не менялась.
+    Используется с тем же экземпляром поста и префиксом publication;
+    если поля не переданы, статус поста остается прежним.
+    """
+    prefix = 'publication'
+
+    class Meta:
+        model = Post
+        fields = ('status', 'publish_at')
+        labels = {
+            'status': 'Публикация',
+            'publish_at': 'Опубликовать',
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['status'].required = False
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.add_prefix('status') not in self.data:
+            cleaned_data['publish_at'] = self.instance.publish_at
+            return cleaned_data
+        status = cleaned_data.get('status') or self.instance.status
+        cleaned_data['status'] = status
+        publish_at = cleaned_data.get('publish_at')
+        if status != Post.SCHEDULED:
+            cleaned_data['publish_at'] = None
+        elif publish_at is None:
+            self.add_error('publish_at', 'Укажите время публикации')
+        elif publish_at <= timezone.now():
+            self.add_error('publish_at', 'Время публикации уже прошло')
+        return cleaned_data
+
+
 class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
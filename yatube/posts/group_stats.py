@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Count, DateTimeField, F, Max, Subquery, Value
+)
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import ArchivedPost, Group, GroupStats, Post
+
+SORTS = {
+    'posts': 'posts_count',
+    'recent': 'last_post_at',
+    'active': 'active_authors',
+}
+
+
+def directory(sort):
+    """Поле сортировки и строки статистики для каталога групп;
+    у каждого поля есть индекс (поле, группа) по убыванию."""
+    field = SORTS.get(sort, SORTS['posts'])
+    stats = GroupStats.objects.select_related('group')
+    if field == 'last_post_at':
+        stats = stats.filter(last_post_at__isnull=False)
+    return field, stats
+
+
+def add_posts(group_id, count, last_post_at):
+    """Учитывает новые опубликованные посты группы."""
+    last_post_at = Value(last_post_at, output_field=DateTimeField())
+    GroupStats.objects.filter(group_id=group_id).update(
+        posts_count=F('posts_count') + count,
+        last_post_at=Greatest(
+            Coalesce('last_post_at', last_post_at), last_post_at)
+    )
+
+
+def remove_posts(group_id, count):
+    """Убирает посты группы; время последнего поста берется
+    по частичному индексу (group, -pub_date)."""
+    last_post = Post.objects.published().filter(
+        group_id=group_id).order_by('-pub_date').values('pub_date')[:1]
+    GroupStats.objects.filter(group_id=group_id).update(
+        posts_count=F('posts_count') - count,
+        last_post_at=Coalesce(Subquery(last_post), 'last_post_at')
+    )
+
+
+def group_totals(posts):
+    return {
+        row['group']: row
+        for row in posts.values('group').order_by().annotate(
+            total=Count('id'), last=Max('pub_date'))
+    }
+
+
+def rebuild(now=None):
+    """Пересчитывает статистику всех групп.
+
+    Число постов и время последнего поста поддерживают сигналы,
+    а активных авторов за ACTIVE_AUTHORS_DAYS считает только
+    пересчет: окно сдвигается со временем. Архивные посты учитываются
+    так же, как при переносе в архив.
+    """
+    now = now or timezone.now()
+    since = now - timedelta(days=settings.ACTIVE_AUTHORS_DAYS)
+    totals = group_totals(Post.objects.published())
+    archived = group_totals(ArchivedPost.objects.published())
+    active = dict(Post.objects.published().filter(
+        pub_date__gte=since
+    ).values_list('group').order_by().annotate(
+        Count('author', distinct=True)))
+    stats = []
+    for group_id in Group.objects.values_list('id', flat=True):
+        rows = [totals.get(group_id, {}), archived.get(group_id, {})]
+        last = [row['last'] for row in rows if row]
+        stats.append(GroupStats(
+            group_id=group_id,
+            posts_count=sum(row.get('total', 0) for row in rows),
+            last_post_at=max(last, default=None),
+            active_authors=active.get(group_id, 0),
+        ))
+    with transaction.atomic():
+        GroupStats.objects.all().delete()
+        GroupStats.objects.bulk_create(stats)
+    return len(stats)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.suggestions import build_suggestions
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации подписок по графу подписок.'
+
+    def handle(self, *args, **options):
+        count = build_suggestions()
+        self.stdout.write(f'Рекомендаций: {count}')
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.publishing import publish_due
+
+
+class Command(BaseCommand):
+    help = 'Публикует запланированные посты, время которых пришло.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', type=int, default=0,
+            help='Проверять очередь каждые N секунд.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            count = publish_due()
+            while count:
+                self.stdout.write(f'Опубликовано постов: {count}')
+                count = publish_due()
+            if not options['loop']:
+                break
+            time.sleep(options['loop'])
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.ranking import RANKINGS
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинги постов для лент top и trending.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', type=int, default=0,
+            help='Повторять пересчет каждые N секунд.'
+        )
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать все посты окна, а не только изменившиеся.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            for name, ranking in RANKINGS.items():
+                count = ranking.rebuild(full=options['full'])
+                self.stdout.write(f'{name}: {count}')
+            if not options['loop']:
+                break
+            time.sleep(options['loop'])
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.counts import recount
+
+
+class Command(BaseCommand):
+    help = 'Сверяет счетчики постов с базой и исправляет расхождения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', type=int, default=0,
+            help='Повторять сверку каждые N секунд.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            count = recount()
+            self.stdout.write(f'Исправлено счетчиков: {count}')
+            if not options['loop']:
+                break
+            time.sleep(options['loop'])
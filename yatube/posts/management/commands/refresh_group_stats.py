@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import group_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает статистику групп для каталога групп.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', type=int, default=0,
+            help='Повторять пересчет каждые N секунд.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            count = group_stats.rebuild()
+            self.stdout.write(f'Пересчитано групп: {count}')
+            if not options['loop']:
+                break
+            time.sleep(options['loop'])
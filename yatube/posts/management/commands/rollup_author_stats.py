@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import rollups
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает дневную активность авторов для профилей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=0,
+            help='Пересчитать последние N дней, например для истории.'
+        )
+        parser.add_argument(
+            '--loop', type=int, default=0,
+            help='Повторять пересчет каждые N секунд.'
+        )
+
+    def handle(self, *args, **options):
+        days = options['days']
+        while True:
+            count = rollups.rollup(days)
+            self.stdout.write(f'Пересчитано дней: {count}')
+            if not options['loop']:
+                break
+            days = 0
+            time.sleep(options['loop'])
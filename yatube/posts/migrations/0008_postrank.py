@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_auto_20220814_1138'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostRank',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feed', models.CharField(max_length=16, verbose_name='Лента')),
+                ('score', models.FloatField(verbose_name='Рейтинг')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ranks', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг поста',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='postrank',
+            index=models.Index(fields=['feed', '-score'], name='post_rank_feed_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='postrank',
+            constraint=models.UniqueConstraint(fields=('feed', 'post'), name='unique_post_rank'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_comment_paths(apps, schema_editor):
+    # Существующие комментарии становятся корнями веток, путь строится
+    # из времени создания, как у новых комментариев.
+    Comment = apps.get_model('posts', 'Comment')
+    for comment in Comment.objects.only('pk', 'created').iterator():
+        created = int(comment.created.timestamp() * 10 ** 6)
+        Comment.objects.filter(pk=comment.pk).update(
+            path=f'{created:013x}{comment.pk % 0x10000:04x}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_followsuggestion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Уровень вложенности'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.Comment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=255, verbose_name='Путь в ветке'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='replies_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число ответов'),
+        ),
+        migrations.RunPython(fill_comment_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='comment_post_path_idx'),
+        ),
+    ]
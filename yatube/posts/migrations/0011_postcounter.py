@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_comment_threads'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('all', 'Все посты'), ('author', 'Посты автора'), ('group', 'Посты группы')], max_length=8, verbose_name='Область')),
+                ('object_id', models.PositiveIntegerField(default=0, verbose_name='Id автора или группы')),
+                ('count', models.IntegerField(verbose_name='Число постов')),
+            ],
+            options={
+                'verbose_name': 'Счетчик постов',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='postcounter',
+            constraint=models.UniqueConstraint(fields=('scope', 'object_id'), name='unique_post_counter'),
+        ),
+    ]
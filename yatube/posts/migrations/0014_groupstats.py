@@ -0,0 +1,63 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Max
+
+
+def fill_group_stats(apps, schema_editor):
+    # Число постов и последний пост для существующих групп; активных
+    # авторов посчитает команда refresh_group_stats.
+    Group = apps.get_model('posts', 'Group')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    stats = {
+        group_id: GroupStats(group_id=group_id)
+        for group_id in Group.objects.values_list('id', flat=True)
+    }
+    for model in ('Post', 'ArchivedPost'):
+        rows = apps.get_model('posts', model).objects.filter(
+            status='published', group__isnull=False
+        ).values('group').order_by().annotate(
+            total=Count('id'), last=Max('pub_date'))
+        for row in rows:
+            group = stats[row['group']]
+            group.posts_count += row['total']
+            group.last_post_at = max(
+                filter(None, (group.last_post_at, row['last'])))
+    GroupStats.objects.bulk_create(stats.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group', verbose_name='Группа')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Число постов')),
+                ('last_post_at', models.DateTimeField(blank=True, null=True, verbose_name='Последний пост')),
+                ('active_authors', models.PositiveIntegerField(default=0, verbose_name='Активные авторы')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Пересчитано')),
+            ],
+            options={
+                'verbose_name': 'Статистика группы',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['-posts_count', '-group'], name='group_stats_posts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['-last_post_at', '-group'], name='group_stats_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['-active_authors', '-group'], name='group_stats_active_idx'),
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count
+
+
+def fill_post_counters(apps, schema_editor):
+    # Счетчики для всех пользователей и групп создаются заранее,
+    # а не при первом чтении, и дальше меняются только сигналами.
+    PostCounter = apps.get_model('posts', 'PostCounter')
+    Post = apps.get_model('posts', 'Post')
+    Group = apps.get_model('posts', 'Group')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    published = Post.objects.filter(status='published').order_by()
+    authors = dict(published.values_list('author').annotate(Count('id')))
+    groups = dict(published.values_list('group').annotate(Count('id')))
+    counters = [PostCounter(scope='all', object_id=0, count=published.count())]
+    counters += [
+        PostCounter(scope='author', object_id=pk, count=authors.get(pk, 0))
+        for pk in User.objects.values_list('pk', flat=True)
+    ]
+    counters += [
+        PostCounter(scope='group', object_id=pk, count=groups.get(pk, 0))
+        for pk in Group.objects.values_list('pk', flat=True)
+    ]
+    PostCounter.objects.all().delete()
+    PostCounter.objects.bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0016_pendingcomment'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_post_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:49
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_fill_post_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postrank',
+            name='updated',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Пересчитан'),
+        ),
+    ]
@@ -1,11 +1,43 @@
+import secrets
+import time
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.dispatch import Signal
+from django.utils import timezone
 
 User = get_user_model()
 
 
+posts_bulk_created = Signal()
+
+
+class PostQuerySet(models.QuerySet):
+
+    def published(self):
+        return self.filter(status=Post.PUBLISHED)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """При вставке пачкой post_save не отправляется, поэтому
+        счетчики постов меняет сигнал posts_bulk_created."""
+        objs = super().bulk_create(objs, *args, **kwargs)
+        posts_bulk_created.send(sender=self.model, posts=objs)
+        return objs
+
+
 class Post(models.Model):
+    DRAFT = 'draft'
+    SCHEDULED = 'scheduled'
+    PUBLISHED = 'published'
+    DELETED = 'deleted'
+    STATUSES = [
+        (DRAFT, 'Черновик'),
+        (SCHEDULED, 'Запланирован'),
+        (PUBLISHED, 'Опубликован'),
+        (DELETED, 'Удален'),
+    ]
+
     text = models.TextField(
         'Текст поста',
         help_text='Введите текст поста'
@@ -35,12 +67,65 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    status = models.CharField(
+        'Статус',
+        max_length=16,
+        choices=STATUSES,
+        default=PUBLISHED
+    )
+    publish_at = models.DateTimeField(
+        'Опубликовать',
+        blank=True,
+        null=True,
+        help_text='Дата и время публикации запланированного поста'
+    )
+    deleted_at = models.DateTimeField('Удален', blank=True, null=True)
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:settings.FIRST_SYMBOLS_NUMBER]
 
+    @property
+    def is_published(self):
+        return self.status == self.PUBLISHED
+
+    def is_visible_to(self, user):
+        """Опубликованный пост виден всем, черновик - только автору,
+        удаленный - никому."""
+        if self.is_published:
+            return True
+        return self.status != self.DELETED and self.author == user
+
+    def soft_delete(self):
+        self.status = self.DELETED
+        self.deleted_at = timezone.now()
+        self.save()
+
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-pub_date'],
+                name='post_published_idx',
+                condition=models.Q(status='published')
+            ),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='post_author_published_idx',
+                condition=models.Q(status='published')
+            ),
+            models.Index(
+                fields=['group', '-pub_date'],
+                name='post_group_published_idx',
+                condition=models.Q(status='published')
+            ),
+            models.Index(
+                fields=['publish_at'],
+                name='post_scheduled_idx',
+                condition=models.Q(status='scheduled')
+            ),
+        ]
         verbose_name = 'Пост'
 
 
@@ -53,13 +138,49 @@ class Group(models.Model):
         return self.title
 
 
-class Comment(models.Model):
+def path_segment():
+    """Сегмент пути комментария: время создания в микросекундах
+    и случайный хвост. Сегменты одной длины сортируются по времени."""
+    return f'{time.time_ns() // 1000:013x}{secrets.randbelow(0x10000):04x}'
+
+
+class CommentTree:
+
+    def subtree_range(self):
+        """Границы путей всех потомков для запроса по индексу."""
+        return {'path__gt': f'{self.path}.', 'path__lt': f'{self.path}/'}
+
+
+class Comment(CommentTree, models.Model):
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
         related_name='comments',
         verbose_name='Пост',
     )
+    parent = models.ForeignKey(
+        'self',
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='replies',
+        verbose_name='Ответ на',
+    )
+    path = models.CharField(
+        'Путь в ветке',
+        max_length=255,
+        editable=False,
+    )
+    depth = models.PositiveSmallIntegerField(
+        'Уровень вложенности',
+        default=0,
+        editable=False,
+    )
+    replies_count = models.PositiveIntegerField(
+        'Число ответов',
+        default=0,
+        editable=False,
+    )
     created = models.DateTimeField(
         'Дата публикации',
         auto_now_add=True
@@ -78,11 +199,63 @@ class Comment(models.Model):
     def __str__(self):
         return self.text[:settings.FIRST_SYMBOLS_NUMBER]
 
+    def fill_path(self):
+        """Вычисляет путь от корня ветки. Ответ на комментарий
+        максимальной глубины становится ответом на его родителя."""
+        if self.parent is not None and (
+                self.parent.depth >= settings.COMMENT_MAX_DEPTH):
+            self.parent = self.parent.parent
+        if self.parent is None:
+            self.depth = 0
+            self.path = path_segment()
+        else:
+            self.depth = self.parent.depth + 1
+            self.path = f'{self.parent.path}.{path_segment()}'
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if not self.path:
+            self.fill_path()
+        super().save(*args, **kwargs)
+        if adding and self.parent_id:
+            Comment.objects.filter(pk=self.parent_id).update(
+                replies_count=models.F('replies_count') + 1)
+
     class Meta:
         ordering = ['-created']
+        indexes = [
+            models.Index(
+                fields=['post', 'path'], name='comment_post_path_idx'),
+            models.Index(fields=['created'], name='comment_created_idx'),
+        ]
         verbose_name = 'Комментарий'
 
 
+class PendingComment(models.Model):
+    """Комментарий к горячему посту, ожидающий сохранения пачкой."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='pending_comments',
+        verbose_name='Пост',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='pending_comments',
+        verbose_name='Автор'
+    )
+    text = models.TextField('Текст комментария')
+    path = models.CharField('Путь в ветке', max_length=255)
+    created = models.DateTimeField('Дата публикации', auto_now_add=True)
+
+    def __str__(self):
+        return self.text[:settings.FIRST_SYMBOLS_NUMBER]
+
+    class Meta:
+        verbose_name = 'Комментарий в очереди'
+
+
 class Follow(models.Model):
     user = models.ForeignKey(
         User,
@@ -94,6 +267,11 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name='following',
     )
+    created = models.DateTimeField(
+        'Дата подписки',
+        auto_now_add=True,
+        db_index=True
+    )
 
     def __str__(self):
         return f'{self.user} подписан на {self.author}'
@@ -102,3 +280,217 @@ class Follow(models.Model):
         constraints = [models.UniqueConstraint(
             fields=['user', 'author'], name='unique_following'),
         ]
+
+
+class PostRank(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='ranks',
+        verbose_name='Пост',
+    )
+    feed = models.CharField('Лента', max_length=16)
+    score = models.FloatField('Рейтинг')
+    updated = models.DateTimeField('Пересчитан', default=timezone.now)
+
+    def __str__(self):
+        return f'{self.feed}: {self.post_id} ({self.score:.2f})'
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=['feed', 'post'], name='unique_post_rank'),
+        ]
+        indexes = [models.Index(
+            fields=['feed', '-score'], name='post_rank_feed_score_idx'),
+        ]
+        verbose_name = 'Рейтинг поста'
+
+
+class FollowSuggestion(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    score = models.PositiveIntegerField('Вес')
+
+    def __str__(self):
+        return f'{self.user} может подписаться на {self.author}'
+
+    class Meta:
+        ordering = ['-score']
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'author'], name='unique_follow_suggestion'),
+        ]
+        indexes = [models.Index(
+            fields=['user', '-score'], name='follow_suggestion_user_idx'),
+        ]
+        verbose_name = 'Рекомендация подписки'
+
+
+class PostCounter(models.Model):
+    ALL = 'all'
+    AUTHOR = 'author'
+    GROUP = 'group'
+    SCOPES = [
+        (ALL, 'Все посты'),
+        (AUTHOR, 'Посты автора'),
+        (GROUP, 'Посты группы'),
+    ]
+
+    scope = models.CharField('Область', max_length=8, choices=SCOPES)
+    object_id = models.PositiveIntegerField('Id автора или группы', default=0)
+    count = models.IntegerField('Число постов')
+
+    def __str__(self):
+        return f'{self.scope} {self.object_id}: {self.count}'
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=['scope', 'object_id'], name='unique_post_counter'),
+        ]
+        verbose_name = 'Счетчик постов'
+
+
+class ArchivedPost(models.Model):
+    """Старый пост, перенесенный командой archive_posts из Post.
+
+    Сохраняет id поста, поэтому старые ссылки продолжают работать:
+    post_detail и profile читают архив, если поста нет в Post.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    pub_date = models.DateTimeField('Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        verbose_name='Группа'
+    )
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    status = models.CharField(
+        'Статус', max_length=16, choices=Post.STATUSES)
+    deleted_at = models.DateTimeField('Удален', blank=True, null=True)
+    archived_at = models.DateTimeField('Перенесен в архив', auto_now_add=True)
+
+    objects = PostQuerySet.as_manager()
+
+    def __str__(self):
+        return self.text[:settings.FIRST_SYMBOLS_NUMBER]
+
+    class Meta:
+        ordering = ['-pub_date']
+        indexes = [models.Index(
+            fields=['author', '-pub_date'], name='archived_post_author_idx'),
+        ]
+        verbose_name = 'Архивный пост'
+
+
+class ArchivedComment(CommentTree, models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Пост',
+    )
+    parent = models.ForeignKey(
+        'self',
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='replies',
+        verbose_name='Ответ на',
+    )
+    path = models.CharField('Путь в ветке', max_length=255)
+    depth = models.PositiveSmallIntegerField('Уровень вложенности')
+    replies_count = models.PositiveIntegerField('Число ответов')
+    created = models.DateTimeField('Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор'
+    )
+    text = models.TextField('Текст комментария')
+
+    def __str__(self):
+        return self.text[:settings.FIRST_SYMBOLS_NUMBER]
+
+    class Meta:
+        ordering = ['-created']
+        indexes = [models.Index(
+            fields=['post', 'path'], name='archived_comment_path_idx'),
+        ]
+        verbose_name = 'Архивный комментарий'
+
+
+class GroupStats(models.Model):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Группа'
+    )
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+    last_post_at = models.DateTimeField(
+        'Последний пост', null=True, blank=True)
+    active_authors = models.PositiveIntegerField(
+        'Активные авторы', default=0)
+    updated = models.DateTimeField('Пересчитано', auto_now=True)
+
+    def __str__(self):
+        return f'{self.group}: {self.posts_count}'
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-posts_count', '-group'],
+                name='group_stats_posts_idx'
+            ),
+            models.Index(
+                fields=['-last_post_at', '-group'],
+                name='group_stats_recent_idx'
+            ),
+            models.Index(
+                fields=['-active_authors', '-group'],
+                name='group_stats_active_idx'
+            ),
+        ]
+        verbose_name = 'Статистика группы'
+
+
+class AuthorDailyStats(models.Model):
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='daily_stats',
+        verbose_name='Автор'
+    )
+    day = models.DateField('День')
+    posts = models.PositiveIntegerField('Постов', default=0)
+    comments = models.PositiveIntegerField('Комментариев к постам', default=0)
+    followers = models.PositiveIntegerField('Новых подписчиков', default=0)
+
+    def __str__(self):
+        return f'{self.author} {self.day}'
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=['author', 'day'], name='unique_author_day'),
+        ]
+        verbose_name = 'Активность автора за день'
@@ -0,0 +1,80 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import group_stats
+from .counts import change_stored_counts, next_generation
+from .models import Post
+
+
+def publish_due(now=None, batch_size=None):
+    """Публикует пачку запланированных постов, время которых пришло.
+
+    Пачка публикуется одним условным UPDATE: подзапрос по частичному
+    индексу post_scheduled_idx ограничивает ее batch_size самыми
+    ранними постами, а RETURNING отдает авторов, группы и даты
+    опубликованных постов. Дата публикации становится равной
+    запланированной, как и при публикации через save (см. сигнал
+    post_state_before_save). Сигналы при UPDATE не срабатывают,
+    поэтому счетчики постов и статистика групп правятся здесь же.
+    Возвращает число опубликованных постов.
+    """
+    now = now or timezone.now()
+    batch_size = batch_size or settings.PUBLISH_BATCH_SIZE
+    pub_date = Post._meta.get_field('pub_date')
+    skip_locked = ''
+    if connection.features.has_select_for_update_skip_locked:
+        skip_locked = 'FOR UPDATE SKIP LOCKED'
+    table = Post._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {table} SET status = %s, pub_date = publish_at '
+            f'WHERE status = %s AND id IN ('
+            f'SELECT id FROM {table} WHERE status = %s AND publish_at <= %s '
+            f'ORDER BY publish_at LIMIT %s {skip_locked}'
+            f') RETURNING author_id, group_id, pub_date',
+            [
+                Post.PUBLISHED, Post.SCHEDULED, Post.SCHEDULED,
+                pub_date.get_db_prep_value(now, connection), batch_size
+            ]
+        )
+        published = [
+            (author_id, group_id, aware(pub_date.to_python(value)))
+            for author_id, group_id, value in cursor.fetchall()
+        ]
+        if not published:
+            return 0
+        authors = Counter(author_id for author_id, _, _ in published)
+        groups = Counter(group_id for _, group_id, _ in published if group_id)
+        last_post_at = {}
+        for _, group_id, value in published:
+            last_post_at[group_id] = max(
+                last_post_at.get(group_id, value), value)
+        change_stored_counts(len(published), total=True)
+        for author_id, count in authors.items():
+            change_stored_counts(count, author_id=author_id, total=False)
+        for group_id, count in groups.items():
+            change_stored_counts(count, group_id=group_id, total=False)
+            group_stats.add_posts(group_id, count, last_post_at[group_id])
+    next_generation()
+    return len(published)
+
+
+def aware(value):
+    if settings.USE_TZ and timezone.is_naive(value):
+        return timezone.make_aware(value, timezone.utc)
+    return value
+
+
+def publication_date(post, previous_status, now=None):
+    """Дата публикации поста, который публикуется только сейчас.
+
+    Запланированный пост получает запланированное время, но не
+    позже текущего, как и у publish_due; остальные - текущее.
+    """
+    now = now or timezone.now()
+    if previous_status == Post.SCHEDULED and post.publish_at:
+        return min(post.publish_at, now)
+    return now
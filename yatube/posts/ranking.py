@@ -0,0 +1,120 @@
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .models import Comment, Follow, Post, PostRank
+
+RANKINGS = {}
+
+
+def register(ranking):
+    RANKINGS[ranking.name] = ranking
+    return ranking
+
+
+def get_ranking(sort, window=None):
+    """Возвращает ленту по параметрам запроса или None для
+    обычной хронологической ленты."""
+    if sort == 'top':
+        return RANKINGS.get(f'top_{window or "24h"}')
+    return RANKINGS.get(sort)
+
+
+def top_score(comments, reach, pub_date):
+    """Комментарии к посту и охват автора."""
+    return comments + settings.RANK_REACH_WEIGHT * math.log1p(reach)
+
+
+def trending_score(comments, reach, pub_date):
+    """Очки поста с поправкой на свежесть.
+
+    Свежесть прибавляется к логарифму очков, поэтому рейтинг не зависит
+    от времени пересчета: пост, опубликованный на RANK_TRENDING_HOURS
+    часов позже, обходит другой при в e раз меньшем числе очков.
+    """
+    points = top_score(comments, reach, pub_date)
+    hours = pub_date.timestamp() / 3600
+    return math.log1p(points) + hours / settings.RANK_TRENDING_HOURS
+
+
+class Ranking:
+    """Лента, посты в которой отсортированы по рейтингу.
+
+    Рейтинг считает команда rank_posts и складывает в PostRank,
+    поэтому при показе ленты достаточно прочитать готовый индекс.
+    score получает число комментариев к посту, число подписчиков
+    автора и дату публикации.
+    """
+
+    def __init__(self, name, query, window, score):
+        self.name = name
+        self.query = query
+        self.window = window
+        self.score = score
+
+    def posts(self):
+        return Post.objects.published().filter(
+            ranks__feed=self.name).order_by('-ranks__score', '-pub_date')
+
+    def rebuild(self, now=None, full=False):
+        """Пересчитывает рейтинги и возвращает их число.
+
+        Без full пересчитываются только посты окна, у которых
+        с прошлого пересчета появились комментарии или подписчики
+        автора, и посты, которых еще нет в ленте. Посты, вышедшие
+        из окна, убираются из ленты. Отписки и удаленные комментарии
+        учитывает полный пересчет.
+        """
+        now = now or timezone.now()
+        since = now - self.window
+        ranks = PostRank.objects.filter(feed=self.name)
+        last = ranks.aggregate(Max('updated'))['updated__max']
+        posts = Post.objects.published().filter(pub_date__gte=since)
+        comments = Comment.objects.filter(post__pub_date__gte=since)
+        if last is not None and not full:
+            posts = posts.filter(
+                Q(pk__in=Comment.objects.filter(
+                    created__gte=last).values('post'))
+                | Q(author__in=Follow.objects.filter(
+                    created__gte=last).values('author'))
+                | ~Q(pk__in=ranks.values('post'))
+            )
+        posts = list(posts.only('id', 'author_id', 'pub_date'))
+        if last is not None and not full:
+            comments = comments.filter(post__in=[post.id for post in posts])
+        comments = dict(comments.values_list('post').order_by().annotate(
+            Count('id')))
+        reach = dict(Follow.objects.filter(
+            author__in={post.author_id for post in posts}
+        ).values_list('author').annotate(Count('id')))
+        with transaction.atomic():
+            if not full:
+                ranks = ranks.filter(
+                    Q(post__pub_date__lt=since) | Q(post__in=posts))
+            ranks.delete()
+            PostRank.objects.bulk_create([
+                PostRank(
+                    post=post,
+                    feed=self.name,
+                    score=self.score(
+                        comments.get(post.id, 0),
+                        reach.get(post.author_id, 0),
+                        post.pub_date
+                    ),
+                    updated=now
+                )
+                for post in posts
+            ])
+        return len(posts)
+
+
+register(Ranking(
+    'top_24h', 'sort=top&window=24h&', timedelta(days=1), top_score))
+register(Ranking(
+    'top_7d', 'sort=top&window=7d&', timedelta(days=7), top_score))
+register(Ranking(
+    'trending', 'sort=trending&', timedelta(days=3), trending_score))
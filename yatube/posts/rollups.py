@@ -0,0 +1,104 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import AuthorDailyStats, Comment, Follow, Post
+
+FIELDS = ('posts', 'comments', 'followers')
+LEVELS = 4
+
+
+def day_range(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def rollup_day(day):
+    """Пересчитывает активность всех авторов за один день.
+
+    Каждый агрегат берет строки одного дня по индексу даты, поэтому
+    пересчет не зависит от длины истории. Подписки считаются по дате
+    создания: отписки удаляют строку, и прирост за прошлые дни
+    не уменьшается. Возвращает число строк дня.
+    """
+    start, end = day_range(day)
+    counts = {
+        'posts': Post.objects.published().filter(
+            pub_date__gte=start, pub_date__lt=end
+        ).values_list('author'),
+        'comments': Comment.objects.filter(
+            created__gte=start, created__lt=end
+        ).values_list('post__author'),
+        'followers': Follow.objects.filter(
+            created__gte=start, created__lt=end
+        ).values_list('author'),
+    }
+    rows = {}
+    for field, query in counts.items():
+        for author_id, count in query.order_by().annotate(Count('id')):
+            rows.setdefault(
+                author_id, AuthorDailyStats(author_id=author_id, day=day)
+            )
+            setattr(rows[author_id], field, count)
+    with transaction.atomic():
+        AuthorDailyStats.objects.filter(day=day).delete()
+        AuthorDailyStats.objects.bulk_create(rows.values())
+    return len(rows)
+
+
+def rollup(days=None, today=None):
+    """Пересчитывает дни с последнего сохраненного по сегодняшний.
+
+    Последний день в таблице мог быть посчитан не до конца, поэтому
+    он пересчитывается снова; days задает число дней явно, например
+    для заполнения истории. Возвращает число пересчитанных дней.
+    """
+    today = today or timezone.localdate()
+    if days:
+        start = today - timedelta(days=days - 1)
+    else:
+        last = AuthorDailyStats.objects.aggregate(Max('day'))['day__max']
+        start = min(last or today, today - timedelta(days=1))
+    day = start
+    while day <= today:
+        rollup_day(day)
+        day += timedelta(days=1)
+    return (today - start).days + 1
+
+
+def author_activity(author_id, days=None):
+    """Строки активности автора за последние days дней одним
+    запросом по ограничению unique_author_day."""
+    days = days or settings.ACTIVITY_DAYS
+    since = timezone.localdate() - timedelta(days=days - 1)
+    return AuthorDailyStats.objects.filter(
+        author_id=author_id, day__gte=since
+    ).order_by('day').values('day', *FIELDS)
+
+
+def totals(rows):
+    return {field: sum(row[field] for row in rows) for field in FIELDS}
+
+
+def heatmap(rows, days=None):
+    """Недели для тепловой карты: по семь дней, у каждого дня число
+    постов и уровень от 0 до LEVELS относительно самого активного."""
+    days = days or settings.ACTIVITY_DAYS
+    today = timezone.localdate()
+    first = today - timedelta(days=days - 1)
+    first -= timedelta(days=first.weekday())
+    posts = {row['day']: row['posts'] for row in rows}
+    busiest = max(posts.values(), default=0)
+    weeks = []
+    day = first
+    while day <= today:
+        count = posts.get(day, 0)
+        level = -(-count * LEVELS // busiest) if busiest else 0
+        if day.weekday() == 0:
+            weeks.append([])
+        weeks[-1].append({'day': day, 'posts': count, 'level': level})
+        day += timedelta(days=1)
+    return weeks
@@ -0,0 +1,109 @@
+from collections import Counter
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import follow_graph, group_stats
+from .comment_buffer import forget_post
+from .counts import change_stored_counts, next_generation
+from .models import (
+    Follow, Group, GroupStats, Post, PostCounter, User, posts_bulk_created
+)
+from .publishing import publication_date
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        follow_graph.forget_follows(instance.user_id, [instance.author_id])
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    follow_graph.forget_follows(instance.user_id, [instance.author_id])
+
+
+@receiver(pre_save, sender=Post)
+def post_state_before_save(sender, instance, **kwargs):
+    """Запоминает группу и статус поста до сохранения; пост, который
+    публикуется только сейчас, получает дату публикации
+    по правилу publication_date."""
+    instance.saved_state = None
+    if instance.pk is not None:
+        instance.saved_state = Post.objects.filter(
+            pk=instance.pk).values_list('group_id', 'status').first()
+    if (
+        instance.saved_state is not None
+        and instance.is_published
+        and instance.saved_state[1] != Post.PUBLISHED
+    ):
+        instance.pub_date = publication_date(
+            instance, instance.saved_state[1])
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    next_generation()
+    group_id, status = instance.saved_state or (None, None)
+    old = (group_id, status == Post.PUBLISHED)
+    new = (instance.group_id, instance.is_published)
+    if old == new:
+        return
+    if old[1] != new[1]:
+        forget_post(instance.pk)
+    if old[1]:
+        change_stored_counts(
+            -1, author_id=instance.author_id, group_id=group_id)
+        if group_id:
+            group_stats.remove_posts(group_id, 1)
+    if new[1]:
+        change_stored_counts(
+            1, author_id=instance.author_id, group_id=instance.group_id)
+        if instance.group_id:
+            group_stats.add_posts(instance.group_id, 1, instance.pub_date)
+
+
+@receiver(posts_bulk_created, sender=Post)
+def posts_created(sender, posts, **kwargs):
+    next_generation()
+    published = [post for post in posts if post.is_published]
+    if not published:
+        return
+    change_stored_counts(len(published))
+    authors = Counter(post.author_id for post in published)
+    for author_id, count in authors.items():
+        change_stored_counts(count, author_id=author_id, total=False)
+    groups = {}
+    for post in published:
+        if post.group_id:
+            count, last = groups.get(post.group_id, (0, post.pub_date))
+            groups[post.group_id] = (count + 1, max(last, post.pub_date))
+    for group_id, (count, last) in groups.items():
+        change_stored_counts(count, group_id=group_id, total=False)
+        group_stats.add_posts(group_id, count, last)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    next_generation()
+    forget_post(instance.pk)
+    if instance.is_published:
+        change_stored_counts(
+            -1, author_id=instance.author_id, group_id=instance.group_id)
+        if instance.group_id:
+            group_stats.remove_posts(instance.group_id, 1)
+
+
+@receiver(post_save, sender=Group)
+def group_created(sender, instance, created, **kwargs):
+    if created:
+        GroupStats.objects.create(group=instance)
+        PostCounter.objects.create(
+            scope=PostCounter.GROUP, object_id=instance.pk, count=0)
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, **kwargs):
+    if created:
+        PostCounter.objects.create(
+            scope=PostCounter.AUTHOR, object_id=instance.pk, count=0)
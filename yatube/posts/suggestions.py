@@ -0,0 +1,56 @@
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Follow, FollowSuggestion
+
+FRIEND_OF_FRIEND_WEIGHT = 2
+CO_FOLLOW_WEIGHT = 1
+
+
+def load_graph():
+    followees = defaultdict(set)
+    followers = defaultdict(set)
+    for user_id, author_id in Follow.objects.values_list(
+            'user_id', 'author_id').iterator():
+        followees[user_id].add(author_id)
+        followers[author_id].add(user_id)
+    return followees, followers
+
+
+def suggest(user_id, followees, followers, limit):
+    """Считает кандидатов для подписки одного пользователя.
+
+    Авторы, на которых подписаны его авторы (друзья друзей), весят
+    больше, чем авторы, на которых подписаны читатели тех же авторов.
+    """
+    following = followees[user_id]
+    scores = Counter()
+    for author_id in following:
+        for candidate in followees.get(author_id, ()):
+            scores[candidate] += FRIEND_OF_FRIEND_WEIGHT
+        for reader_id in followers[author_id]:
+            if reader_id == user_id:
+                continue
+            for candidate in followees[reader_id]:
+                scores[candidate] += CO_FOLLOW_WEIGHT
+    for author_id in following | {user_id}:
+        scores.pop(author_id, None)
+    return scores.most_common(limit)
+
+
+def build_suggestions(limit=None, batch_size=1000):
+    """Пересчитывает таблицу рекомендаций по всему графу подписок."""
+    limit = limit or settings.SUGGESTIONS_NUMBER
+    followees, followers = load_graph()
+    suggestions = [
+        FollowSuggestion(user_id=user_id, author_id=author_id, score=score)
+        for user_id in list(followees)
+        for author_id, score in suggest(user_id, followees, followers, limit)
+    ]
+    with transaction.atomic():
+        FollowSuggestion.objects.all().delete()
+        FollowSuggestion.objects.bulk_create(
+            suggestions, batch_size=batch_size)
+    return len(suggestions)
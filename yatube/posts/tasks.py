@@ -0,0 +1,21 @@
+from sorl.thumbnail import get_thumbnail
+
+from core.tasks import enqueue_on_commit, task
+
+from .comment_buffer import flush_comments  # noqa: F401
+from .models import Post
+
+
+@task()
+def make_thumbnail(post_id):
+    """Заранее создает миниатюру картинки поста для шаблонов."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is not None and post.image:
+        # Параметры совпадают с тегом thumbnail в шаблонах постов.
+        get_thumbnail(post.image, '960x339', crop='center', upscale=True)
+
+
+def enqueue_thumbnail(post):
+    if post.image:
+        enqueue_on_commit(
+            make_thumbnail, post.pk, key=f'thumbnail:{post.image.name}')
@@ -0,0 +1,10 @@
+from django import template
+
+from posts.follow_state import get_follow_state
+
+register = template.Library()
+
+
+@register.filter
+def is_followed(author, request):
+    return get_follow_state(request).is_following(author.pk)
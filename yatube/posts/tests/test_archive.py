@@ -0,0 +1,113 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.archive import archive_batch
+from posts.counts import stored_count
+from posts.models import (
+    ArchivedComment, ArchivedPost, Comment, Post, PostCounter
+)
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='archivist')
+        cls.old_posts = [
+            Post.objects.create(author=cls.user, text=f'Старый пост {number}')
+            for number in range(settings.VIEW_POST_NUMBER)
+        ]
+        Post.objects.filter(pk__in=[post.pk for post in cls.old_posts]).update(
+            pub_date=timezone.now() - timedelta(days=400))
+        cls.post = Post.objects.create(author=cls.user, text='Новый пост')
+        root = Comment.objects.create(
+            post=cls.old_posts[0], author=cls.user, text='Корень')
+        Comment.objects.create(
+            post=cls.old_posts[0], author=cls.user, text='Ответ', parent=root)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_soft_delete(self):
+        """Удаленный пост остается в базе, но пропадает из лент
+        и со страницы поста."""
+        self.assertEqual(stored_count(PostCounter.ALL), 11)
+        self.authorized_client.post(
+            reverse('posts:post_delete', args=(self.post.id,)))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.status, Post.DELETED)
+        self.assertIsNotNone(self.post.deleted_at)
+        self.assertEqual(stored_count(PostCounter.ALL), 10)
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', args=(self.post.id,)))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_archived_post_read_from_archive(self):
+        """Старые посты с комментариями переносятся в архив, а их
+        страница и профиль автора читают архив."""
+        self.assertEqual(archive_batch(), settings.VIEW_POST_NUMBER)
+        self.assertEqual(archive_batch(), 0)
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(ArchivedPost.objects.count(), 10)
+        self.assertEqual(ArchivedComment.objects.count(), 2)
+        self.assertFalse(Comment.objects.exists())
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.old_posts[0].id,)))
+        self.assertTrue(response.context['archived'])
+        self.assertEqual(response.context['author_posts_count'], 11)
+        root = response.context['comments'][0]
+        self.assertEqual(
+            [root.text, *[reply.text for reply in root.thread]],
+            ['Корень', 'Ответ']
+        )
+        address = reverse('posts:profile', args=(self.user.username,))
+        first_page = self.client.get(address).context['page_obj']
+        self.assertEqual(first_page.paginator.count, 11)
+        self.assertEqual(first_page[0], self.post)
+        self.assertIsInstance(first_page[1], ArchivedPost)
+        second_page = self.client.get(address, {'page': 2}).context['page_obj']
+        self.assertEqual(len(second_page), 1)
+
+    def test_no_comments_on_deleted_post(self):
+        """Удаленный пост не принимает комментарии ни напрямую,
+        ни через буфер горячих постов."""
+        self.post.soft_delete()
+        address = reverse('posts:add_comment', args=(self.post.id,))
+        for threshold in (20, 0):
+            with self.subTest(threshold=threshold):
+                with override_settings(COMMENT_HOT_THRESHOLD=threshold):
+                    response = self.authorized_client.post(
+                        address, {'text': 'Поздно'})
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertFalse(self.post.comments.exists())
+
+    def test_profile_fragment_continues_into_archive(self):
+        """Бесконечная лента профиля после горячих постов
+        продолжается архивными."""
+        archive_batch()
+        address = reverse(
+            'posts:profile_fragment', args=(self.user.username,))
+        texts = []
+        cursor = ''
+        while cursor is not None:
+            data = self.client.get(address, {'cursor': cursor}).json()
+            texts += [
+                text for text in ['Новый пост'] + [
+                    f'Старый пост {number}'
+                    for number in range(settings.VIEW_POST_NUMBER)
+                ]
+                if text in data['html']
+            ]
+            cursor = data['next_cursor']
+        self.assertEqual(len(texts), settings.VIEW_POST_NUMBER + 1)
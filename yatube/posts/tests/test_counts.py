@@ -0,0 +1,122 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.counts import bounded_count, cached_count, recount, stored_count
+from posts.models import Group, Post, PostCounter
+from posts.utils import CountedPaginator
+
+User = get_user_model()
+
+
+class PostCountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='counted_author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='counted', description='Описание')
+        cls.other_group = Group.objects.create(
+            title='Другая', slug='other', description='Описание')
+        Post.objects.create(author=cls.user, text='Пост', group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_stored_counts_follow_posts(self):
+        """Счетчики постов меняются при создании, смене группы
+        и удалении поста."""
+        scopes = [
+            (PostCounter.ALL, 0),
+            (PostCounter.AUTHOR, self.user.pk),
+            (PostCounter.GROUP, self.group.pk),
+            (PostCounter.GROUP, self.other_group.pk),
+        ]
+        self.assertEqual([stored_count(*scope) for scope in scopes],
+                         [1, 1, 1, 0])
+        post = Post.objects.create(
+            author=self.user, text='Еще', group=self.group)
+        self.assertEqual([stored_count(*scope) for scope in scopes],
+                         [2, 2, 2, 0])
+        post.group = self.other_group
+        post.save()
+        self.assertEqual([stored_count(*scope) for scope in scopes],
+                         [2, 2, 1, 1])
+        post.delete()
+        self.assertEqual([stored_count(*scope) for scope in scopes],
+                         [1, 1, 1, 0])
+
+    def test_counters_created_with_author_and_group(self):
+        """Счетчики создаются вместе с автором и группой, а чтение
+        без счетчика их не создает."""
+        user = User.objects.create_user(username='new_author')
+        self.assertEqual(
+            PostCounter.objects.get(
+                scope=PostCounter.AUTHOR, object_id=user.pk).count,
+            0
+        )
+        self.assertTrue(PostCounter.objects.filter(
+            scope=PostCounter.GROUP, object_id=self.group.pk).exists())
+        PostCounter.objects.filter(scope=PostCounter.AUTHOR).delete()
+        self.assertEqual(stored_count(PostCounter.AUTHOR, self.user.pk), 1)
+        self.assertFalse(
+            PostCounter.objects.filter(scope=PostCounter.AUTHOR).exists())
+
+    def test_index_without_full_count(self):
+        """Лента берет число постов из счетчика, а не из COUNT."""
+        stored_count(PostCounter.ALL)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+        self.assertFalse([
+            query for query in queries
+            if 'COUNT' in query['sql'] and 'posts_post' in query['sql']
+        ])
+
+    @override_settings(COUNT_LIMIT=2)
+    def test_cached_count_is_bounded_and_invalidated(self):
+        """Кешированное число ограничено сверху и сбрасывается
+        новым постом."""
+        post_list = Post.objects.filter(author=self.user)
+        self.assertEqual(cached_count(post_list), 1)
+        Post.objects.create(author=self.user, text='Второй')
+        self.assertEqual(cached_count(post_list), 2)
+        Post.objects.create(author=self.user, text='Третий')
+        self.assertEqual(cached_count(post_list), 2)
+        self.assertEqual(bounded_count(post_list, limit=5), 3)
+
+    def test_bulk_create_changes_counters(self):
+        """Вставка пачкой меняет счетчики так же, как сигналы."""
+        Post.objects.bulk_create([
+            Post(author=self.user, text='Пачка', group=self.other_group),
+            Post(author=self.user, text='Пачка'),
+            Post(author=self.user, text='Черновик', status=Post.DRAFT),
+        ])
+        self.assertEqual(
+            [stored_count(PostCounter.ALL),
+             stored_count(PostCounter.AUTHOR, self.user.pk),
+             stored_count(PostCounter.GROUP, self.other_group.pk)],
+            [3, 3, 1]
+        )
+        self.assertEqual(recount(), 0)
+
+    def test_recount_fixes_drift(self):
+        """Сверка исправляет счетчики, сбитые обходом сигналов."""
+        Post.objects.filter(author=self.user).update(group=self.other_group)
+        self.assertEqual(stored_count(PostCounter.GROUP, self.group.pk), 1)
+        self.assertEqual(recount(), 2)
+        self.assertEqual(stored_count(PostCounter.GROUP, self.group.pk), 0)
+        self.assertEqual(
+            stored_count(PostCounter.GROUP, self.other_group.pk), 1)
+
+    def test_capped_paginator(self):
+        """Число, дошедшее до предела подсчета, помечено как неполное."""
+        post_list = Post.objects.all()
+        self.assertTrue(
+            CountedPaginator(post_list, 1, lambda: 2, limit=2).capped)
+        self.assertFalse(
+            CountedPaginator(post_list, 1, lambda: 1, limit=2).capped)
+        self.assertFalse(CountedPaginator(post_list, 1, lambda: 2).capped)
@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.test import TransactionTestCase
+
+from posts import follow_graph
+from posts.models import Follow
+
+User = get_user_model()
+
+
+class FollowGraphTests(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            User.objects.create_user(username=f'user_{i}') for i in range(4)
+        ]
+
+    def test_ids_loaded_once(self):
+        """Подписки читаются из базы один раз, дальше из кеша."""
+        reader, *authors = self.users
+        for author in reversed(authors):
+            Follow.objects.create(user=reader, author=author)
+        with self.assertNumQueries(1):
+            follow_graph.followee_ids(reader.pk)
+        with self.assertNumQueries(0):
+            ids = follow_graph.followee_ids(reader.pk)
+        self.assertEqual(list(ids), sorted(author.pk for author in authors))
+
+    def test_changes_reset_cache_after_commit(self):
+        """Подписка и отписка сбрасывают массивы после фиксации,
+        а откаченная подписка в кеш не попадает."""
+        reader, author, *_ = self.users
+        follow_graph.followee_ids(reader.pk)
+        with self.assertRaises(DatabaseError):
+            with transaction.atomic():
+                Follow.objects.create(user=reader, author=author)
+                raise DatabaseError
+        with self.assertNumQueries(0):
+            self.assertFalse(follow_graph.contains(
+                follow_graph.followee_ids(reader.pk), author.pk))
+        follow = Follow.objects.create(user=reader, author=author)
+        self.assertTrue(follow_graph.contains(
+            follow_graph.followee_ids(reader.pk), author.pk))
+        self.assertEqual(
+            list(follow_graph.follower_ids(author.pk)), [reader.pk])
+        follow.delete()
+        self.assertFalse(follow_graph.contains(
+            follow_graph.followee_ids(reader.pk), author.pk))
@@ -1,6 +1,8 @@
+import json
 import shutil
 import tempfile
 from http import HTTPStatus
+from unittest import mock
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -8,9 +10,13 @@ from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from faker import Faker
 
-from posts.models import Comment, Group, Post
+from core.models import Task
+from core.tasks import DatabaseBroker
+from posts.comment_buffer import comment_buffer, flush_comments
+from posts.models import Comment, Group, PendingComment, Post
 
 User = get_user_model()
 fake = Faker()
@@ -208,3 +214,125 @@ class PostCreateFormTests(TestCase):
         )
         self.assertRedirects(response, redirect_address)
         self.assertEqual(Comment.objects.count(), comments_count)
+
+
+@override_settings(
+    COMMENT_HOT_THRESHOLD=0,
+    COMMENT_BATCH_DELAY=60,
+    TASK_BROKER='core.tasks.DatabaseBroker'
+)
+class HotPostCommentTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='commentator')
+        cls.post = Post.objects.create(author=cls.user, text=fake.text())
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def test_comments_saved_in_batch(self):
+        """Комментарии к горячему посту ждут в кеше одну задачу на
+        окно и сохраняются пачкой с временем отправки."""
+        address = reverse(
+            'posts:add_comment', args=(HotPostCommentTests.post.id,))
+        before = timezone.now()
+        for number in range(3):
+            self.authorized_client.post(address, {'text': f'текст {number}'})
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertFalse(PendingComment.objects.exists())
+        task = Task.objects.get(name=flush_comments.task_name)
+        sent = timezone.now()
+        self.assertEqual(comment_buffer.flush(*json.loads(task.args)), 3)
+        self.assertEqual(
+            set(Comment.objects.values_list('text', flat=True)),
+            {'текст 0', 'текст 1', 'текст 2'}
+        )
+        self.assertLess(Comment.objects.latest('created').created, sent)
+        self.assertGreaterEqual(
+            Comment.objects.earliest('created').created, before)
+
+    def test_table_fallback(self):
+        """Без кеша комментарий пишется в таблицу и сохраняется
+        той же задачей."""
+        with mock.patch('posts.views.is_hot', return_value=True), \
+                mock.patch('posts.comment_buffer.increment',
+                           side_effect=OSError):
+            self.authorized_client.post(
+                reverse('posts:add_comment',
+                        args=(HotPostCommentTests.post.id,)),
+                {'text': 'из таблицы'}
+            )
+        self.assertEqual(PendingComment.objects.count(), 1)
+        task = Task.objects.get(name=flush_comments.task_name)
+        self.assertEqual(comment_buffer.flush(*json.loads(task.args)), 1)
+        self.assertEqual(Comment.objects.get().text, 'из таблицы')
+        self.assertFalse(PendingComment.objects.exists())
+
+    def test_commenter_sees_own_comment(self):
+        """После редиректа автор видит свой комментарий."""
+        response = self.authorized_client.post(
+            reverse('posts:add_comment', args=(HotPostCommentTests.post.id,)),
+            {'text': 'мой комментарий'},
+            follow=True
+        )
+        self.assertEqual(
+            response.context['comments'][0].text, 'мой комментарий')
+        self.assertEqual(Comment.objects.count(), 0)
+
+    @override_settings(COMMENT_BATCH_DELAY=0)
+    def test_worker_flushes_queue(self):
+        """Очередь сохраняет фоновая задача, а не запрос."""
+        self.authorized_client.post(
+            reverse('posts:add_comment', args=(HotPostCommentTests.post.id,)),
+            {'text': 'из очереди'}
+        )
+        self.assertEqual(Comment.objects.count(), 0)
+        DatabaseBroker().process()
+        self.assertEqual(Comment.objects.get().text, 'из очереди')
+
+
+class FragmentResponseTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='fragment_author')
+        cls.post = Post.objects.create(author=cls.user, text=fake.text())
+
+    def setUp(self):
+        self.authorized_client = Client(HTTP_HX_REQUEST='true')
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def test_create_post_returns_article(self):
+        """Запрос за фрагментом получает разметку нового поста
+        вместо редиректа."""
+        response = self.authorized_client.post(
+            reverse('posts:post_create'), {'text': 'фрагмент поста'})
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertTemplateUsed(response, 'includes/article.html')
+        self.assertContains(
+            response, 'фрагмент поста', status_code=HTTPStatus.CREATED)
+        self.assertTrue(Post.objects.filter(text='фрагмент поста').exists())
+
+    def test_add_comment_returns_comment(self):
+        """Новый комментарий возвращается готовым фрагментом."""
+        response = self.authorized_client.post(
+            reverse(
+                'posts:add_comment', args=(FragmentResponseTests.post.id,)),
+            {'text': 'фрагмент комментария'}
+        )
+        self.assertContains(
+            response, 'фрагмент комментария',
+            status_code=HTTPStatus.CREATED
+        )
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_invalid_form_returns_errors(self):
+        """Ошибки формы возвращаются фрагментом с кодом 400."""
+        response = self.authorized_client.post(
+            reverse('posts:post_create'), {'text': ''})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertTemplateUsed(response, 'posts/includes/mistakes.html')
@@ -0,0 +1,113 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import group_stats
+from posts.archive import archive_batch
+from posts.models import Group, GroupStats, Post
+
+User = get_user_model()
+
+
+class GroupStatsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='group_author')
+        cls.other = User.objects.create_user(username='other_author')
+        cls.big = Group.objects.create(title='Большая', slug='big')
+        cls.small = Group.objects.create(title='Маленькая', slug='small')
+        cls.empty = Group.objects.create(title='Пустая', slug='empty')
+        for author in (cls.user, cls.other, cls.user):
+            Post.objects.create(author=author, group=cls.big, text='Пост')
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.small, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_stats_follow_posts(self):
+        """Создание и удаление постов меняют статистику группы."""
+        stats = GroupStats.objects.get(group=self.small)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.last_post_at, self.post.pub_date)
+        Post.objects.create(
+            author=self.user, group=self.small, text='Черновик',
+            status=Post.DRAFT
+        )
+        self.post.delete()
+        stats.refresh_from_db()
+        self.assertEqual(stats.posts_count, 0)
+        self.assertEqual(GroupStats.objects.get(group=self.big).posts_count, 3)
+
+    def test_rebuild_counts_active_authors(self):
+        """Пересчет находит активных авторов за последние дни."""
+        Post.objects.filter(group=self.big, author=self.other).update(
+            pub_date=timezone.now() - timedelta(days=30))
+        self.assertEqual(group_stats.rebuild(), 3)
+        self.assertEqual(
+            GroupStats.objects.get(group=self.big).active_authors, 1)
+        self.assertEqual(GroupStats.objects.get(group=self.big).posts_count, 3)
+        self.assertIsNone(
+            GroupStats.objects.get(group=self.empty).last_post_at)
+
+    def test_rebuild_matches_incremental_stats(self):
+        """Пересчет дает те же значения, что и сигналы с архивом,
+        включая формат времени в базе."""
+        Post.objects.filter(pk=self.post.pk).update(
+            pub_date=timezone.now() - timedelta(days=400))
+        post = Post.objects.get(pk=self.post.pk)
+        group_stats.remove_posts(self.small.pk, 1)
+        group_stats.add_posts(self.small.pk, 1, post.pub_date)
+        archive_batch()
+
+        def raw_stats():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT group_id, posts_count, last_post_at '
+                    'FROM posts_groupstats ORDER BY group_id'
+                )
+                return cursor.fetchall()
+
+        incremental = raw_stats()
+        group_stats.rebuild()
+        self.assertEqual(raw_stats(), incremental)
+        self.assertEqual(
+            GroupStats.objects.get(group=self.small).last_post_at,
+            post.pub_date
+        )
+
+    @override_settings(GROUPS_NUMBER=1)
+    def test_directory_keyset_pages(self):
+        """Каталог групп листается курсором в порядке сортировки."""
+        address = reverse('posts:group_index')
+        slugs = []
+        cursor = ''
+        for _ in range(3):
+            response = self.client.get(address, {'cursor': cursor})
+            slugs += [stats.group.slug for stats in response.context['groups']]
+            cursor = response.context['next_cursor']
+        self.assertEqual(slugs, ['big', 'small', 'empty'])
+        self.assertIsNone(cursor)
+
+    def test_recent_skips_empty_groups(self):
+        """Сортировка по свежести не показывает группы без постов."""
+        response = self.client.get(
+            reverse('posts:group_index'), {'sort': 'recent'})
+        self.assertEqual(
+            [stats.group.slug for stats in response.context['groups']],
+            ['small', 'big']
+        )
+
+    def test_broken_cursor(self):
+        """Испорченный курсор дает ответ 400."""
+        response = self.client.get(
+            reverse('posts:group_index'), {'cursor': 'сломан'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
@@ -0,0 +1,139 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.counts import stored_count
+from posts.models import Comment, Group, GroupStats, Post, PostCounter
+from posts.publishing import publish_due
+
+User = get_user_model()
+
+
+class PublishingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='scheduler')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_scheduled_post_published_by_publisher(self):
+        """Запланированный пост не виден в ленте до публикации,
+        а публикатор выпускает его с запланированной датой."""
+        publish_at = timezone.now() + timedelta(hours=1)
+        self.authorized_client.post(reverse('posts:post_create'), {
+            'text': 'Отложенный пост',
+            'publication-status': Post.SCHEDULED,
+            'publication-publish_at': publish_at.strftime('%Y-%m-%d %H:%M'),
+        })
+        post = Post.objects.get()
+        self.assertEqual(post.status, Post.SCHEDULED)
+        self.assertEqual(stored_count(PostCounter.ALL), 0)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(len(response.context['page_obj']), 0)
+        self.assertEqual(publish_due(), 0)
+        self.assertEqual(publish_due(now=publish_at), 1)
+        post.refresh_from_db()
+        self.assertEqual(post.status, Post.PUBLISHED)
+        self.assertEqual(post.pub_date, post.publish_at)
+        self.assertEqual(stored_count(PostCounter.ALL), 1)
+        self.assertEqual(stored_count(PostCounter.AUTHOR, self.user.pk), 1)
+
+    def test_past_schedule_rejected(self):
+        """Нельзя запланировать публикацию на прошедшее время."""
+        response = self.authorized_client.post(reverse('posts:post_create'), {
+            'text': 'Опоздавший пост',
+            'publication-status': Post.SCHEDULED,
+            'publication-publish_at': '2000-01-01 10:00',
+        })
+        self.assertFormError(
+            response, 'publication_form', 'publish_at',
+            'Время публикации уже прошло'
+        )
+        self.assertFalse(Post.objects.exists())
+
+    def test_publication_date_same_on_both_paths(self):
+        """Запланированный пост получает запланированную дату и при
+        публикации публикатором, и при сохранении."""
+        publish_at = timezone.now() - timedelta(minutes=5)
+        by_worker, by_save = [
+            Post.objects.create(
+                author=self.user, text=text, status=Post.SCHEDULED,
+                publish_at=publish_at
+            )
+            for text in ('Публикатор', 'Сохранение')
+        ]
+        group = Group.objects.create(title='Группа', slug='scheduled')
+        Post.objects.filter(pk=by_worker.pk).update(group=group)
+        by_save.status = Post.PUBLISHED
+        by_save.save()
+        self.assertEqual(publish_due(), 1)
+        stats = GroupStats.objects.get(group=group)
+        self.assertEqual(
+            (stats.posts_count, stats.last_post_at), (1, publish_at))
+        by_worker.refresh_from_db()
+        by_save.refresh_from_db()
+        self.assertEqual(by_worker.pub_date, publish_at)
+        self.assertEqual(by_save.pub_date, publish_at)
+        self.assertEqual(stored_count(PostCounter.ALL), 2)
+        self.assertEqual(
+            stored_count(PostCounter.AUTHOR, self.user.pk), 2)
+
+    def test_draft_visible_only_to_author(self):
+        """Черновик открывается только автору, а после публикации
+        получает текущую дату."""
+        draft = Post.objects.create(
+            author=self.user, text='Черновик', status=Post.DRAFT)
+        address = reverse('posts:post_detail', args=(draft.id,))
+        self.assertEqual(
+            self.client.get(address).status_code, HTTPStatus.NOT_FOUND)
+        self.assertEqual(
+            self.authorized_client.get(address).status_code, HTTPStatus.OK)
+        Post.objects.filter(pk=draft.pk).update(
+            pub_date=timezone.now() - timedelta(days=1))
+        self.authorized_client.post(
+            reverse('posts:post_edit', args=(draft.id,)),
+            {'text': 'Готово', 'publication-status': Post.PUBLISHED}
+        )
+        draft.refresh_from_db()
+        self.assertTrue(draft.is_published)
+        self.assertGreater(
+            draft.pub_date, timezone.now() - timedelta(minutes=1))
+
+    def test_no_comments_on_unpublished_posts(self):
+        """Комментировать черновик и запланированный пост нельзя,
+        в том числе через буфер горячих постов."""
+        reader = Client()
+        reader.force_login(User.objects.create_user(username='reader'))
+        for status in (Post.DRAFT, Post.SCHEDULED):
+            post = Post.objects.create(
+                author=self.user, text='Не опубликован', status=status)
+            address = reverse('posts:add_comment', args=(post.id,))
+            for threshold in (20, 0):
+                with self.subTest(status=status, threshold=threshold):
+                    with override_settings(COMMENT_HOT_THRESHOLD=threshold):
+                        response = reader.post(address, {'text': 'Чужой'})
+                    self.assertEqual(
+                        response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_replies_of_draft_hidden(self):
+        """Ответы к комментариям черновика видит только автор."""
+        post = Post.objects.create(
+            author=self.user, text='Черновик', status=Post.DRAFT)
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='Заметка')
+        address = reverse(
+            'posts:comment_replies', args=(post.id, comment.id))
+        self.assertEqual(
+            self.client.get(address).status_code, HTTPStatus.NOT_FOUND)
+        self.assertEqual(
+            self.authorized_client.get(address).status_code, HTTPStatus.OK)
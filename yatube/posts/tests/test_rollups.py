@@ -0,0 +1,89 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import rollups
+from posts.models import AuthorDailyStats, Comment, Follow, Post
+
+User = get_user_model()
+
+
+class AuthorRollupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='rollup_author')
+        cls.reader = User.objects.create_user(username='rollup_reader')
+        cls.post = Post.objects.create(author=cls.author, text='Сегодня')
+        old = Post.objects.create(author=cls.author, text='Вчера')
+        Post.objects.filter(pk=old.pk).update(
+            pub_date=timezone.now() - timedelta(days=1))
+        Post.objects.create(
+            author=cls.author, text='Черновик', status=Post.DRAFT)
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_rollup_counts_each_day(self):
+        """Сводка за день считает посты, комментарии и подписчиков."""
+        self.assertEqual(rollups.rollup(), 2)
+        today = AuthorDailyStats.objects.get(
+            author=self.author, day=timezone.localdate())
+        self.assertEqual(
+            (today.posts, today.comments, today.followers), (1, 1, 1))
+        self.assertEqual(AuthorDailyStats.objects.count(), 2)
+
+    def test_rollup_is_repeatable(self):
+        """Повторный пересчет заменяет строки дня, а не дублирует их."""
+        rollups.rollup(days=3)
+        Post.objects.create(author=self.author, text='Еще пост')
+        rollups.rollup()
+        self.assertEqual(
+            AuthorDailyStats.objects.get(
+                author=self.author, day=timezone.localdate()).posts,
+            2
+        )
+
+    def test_stats_endpoint_reads_rollups(self):
+        """Статистика профиля отдается одним запросом к сводкам."""
+        rollups.rollup()
+        address = reverse('posts:profile_stats', args=('rollup_author',))
+        with self.assertNumQueries(2):
+            response = self.client.get(address, {'days': 30})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        data = response.json()
+        self.assertEqual(
+            data['totals'], {'posts': 2, 'comments': 1, 'followers': 1})
+        self.assertEqual(
+            [row['day'] for row in data['days']],
+            [str(timezone.localdate() - timedelta(days=1)),
+             str(timezone.localdate())]
+        )
+
+    def test_stats_endpoint_ignores_bad_days(self):
+        """Нечисловой days заменяется периодом по умолчанию."""
+        address = reverse('posts:profile_stats', args=('rollup_author',))
+        for days in ('²', 'abc', '0', '-5'):
+            with self.subTest(days=days):
+                response = self.client.get(address, {'days': days})
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_profile_heatmap(self):
+        """Тепловая карта профиля отмечает дни с постами."""
+        rollups.rollup()
+        response = self.client.get(
+            reverse('posts:profile', args=('rollup_author',)))
+        cells = [cell for week in response.context['heatmap']
+                 for cell in week]
+        self.assertEqual(cells[-1]['day'], timezone.localdate())
+        self.assertEqual(cells[-1]['level'], rollups.LEVELS)
+        self.assertEqual(sum(cell['posts'] for cell in cells), 2)
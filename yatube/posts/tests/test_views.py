@@ -1,18 +1,26 @@
 import random
 import shutil
 import tempfile
+from datetime import timedelta
 from http import HTTPStatus
+from io import StringIO
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.paginator import Paginator
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from faker import Faker
 
+from posts.follow_state import FollowState
 from posts.forms import PostForm
-from posts.models import Follow, Group, Post
+from posts.models import Comment, Follow, Group, Post, PostRank
+from posts.ranking import get_ranking
+from posts.utils import ELLIPSIS, elided_page_range
 
 User = get_user_model()
 fake = Faker()
@@ -177,6 +185,24 @@ class PostsPagesTests(TestCase):
         response_3 = self.guest_client.get(index_url)
         self.assertNotEqual(response_1.content, response_3.content)
 
+    def test_cache_shared_between_users(self):
+        """Кэш главной страницы общий, но шапка у каждого пользователя
+        своя."""
+        index_url = reverse('posts:index')
+        self.guest_client.get(index_url)
+        test_post = Post.objects.create(
+            author=PostsPagesTests.user,
+            text=fake.text()
+        )
+        response = self.authorized_client.get(index_url)
+        self.assertNotContains(response, test_post.text)
+        username = f'Пользователь: {PostsPagesTests.user.username}'
+        self.assertContains(response, username)
+        self.assertContains(response, reverse('posts:follow_index'))
+        response = self.guest_client.get(index_url)
+        self.assertNotContains(response, username)
+        self.assertNotContains(response, reverse('posts:follow_index'))
+
 
 class FollowTests(TestCase):
 
@@ -258,6 +284,79 @@ class FollowTests(TestCase):
             user=author_user, author=author_user).count()
         self.assertEqual(test_count_1, test_count_2)
 
+    def test_follow_bulk(self):
+        """Подписка на несколько авторов одним запросом."""
+        authors = [
+            User.objects.create_user(username=f'author_{i}')
+            for i in range(3)
+        ]
+        Follow.objects.create(user=FollowTests.user, author=authors[0])
+        self.authorized_client.post(
+            reverse('posts:follow_bulk'),
+            {'author': [author.username for author in authors]
+             + [FollowTests.user.username]}
+        )
+        self.assertEqual(
+            set(Follow.objects.filter(user=FollowTests.user).values_list(
+                'author', flat=True)),
+            {author.pk for author in authors}
+        )
+        self.authorized_client.post(
+            reverse('posts:unfollow_bulk'),
+            {'author': [authors[0].username, authors[1].username]}
+        )
+        self.assertEqual(
+            list(Follow.objects.filter(user=FollowTests.user).values_list(
+                'author', flat=True)),
+            [authors[2].pk]
+        )
+
+    def test_follow_suggestions(self):
+        """Авторы, на которых подписаны мои авторы, попадают
+        в рекомендации."""
+        author_user = User.objects.create_user(username='author_user')
+        suggested = User.objects.create_user(username='suggested')
+        Follow.objects.create(user=FollowTests.user, author=author_user)
+        Follow.objects.create(user=author_user, author=suggested)
+        call_command('build_follow_suggestions', stdout=StringIO())
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [item.author for item in response.context['suggestions']],
+            [suggested]
+        )
+
+    def test_follow_state_single_query(self):
+        """Подписки на авторов страницы загружаются одним запросом."""
+        authors = [
+            User.objects.create_user(username=f'author_{i}')
+            for i in range(3)
+        ]
+        Follow.objects.create(user=FollowTests.user, author=authors[0])
+        state = FollowState(FollowTests.user)
+        with self.assertNumQueries(1):
+            state.prefetch(author.pk for author in authors)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                [state.is_following(author.pk) for author in authors],
+                [True, False, False]
+            )
+
+    def test_follow_buttons_in_group_feed(self):
+        """В ленте группы у постов есть кнопки подписки на авторов."""
+        group = Group.objects.create(
+            title=fake.text(),
+            slug=fake.word(),
+            description=fake.text(),
+        )
+        author_user = User.objects.create_user(username='author_user')
+        Post.objects.create(author=author_user, group=group, text=fake.text())
+        response = self.authorized_client.get(
+            reverse('posts:group_posts', args=(group.slug,)))
+        self.assertContains(
+            response,
+            reverse('posts:profile_follow', args=(author_user.username,))
+        )
+
 
 class PaginatorViewsTest(TestCase):
 
@@ -311,3 +410,209 @@ class PaginatorViewsTest(TestCase):
                     self.assertEqual(len(
                         response.context['page_obj']), page
                     )
+
+    def test_elided_page_range(self):
+        """Навигация по страницам не растет с числом страниц."""
+        paginator = Paginator(range(10 ** 6), settings.VIEW_POST_NUMBER)
+        self.assertEqual(
+            elided_page_range(paginator.page(500)),
+            [1, ELLIPSIS, 498, 499, 500, 501, 502, ELLIPSIS, 100000]
+        )
+        self.assertEqual(
+            elided_page_range(paginator.page(1)), [1, 2, 3, ELLIPSIS, 100000])
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(
+            response.context['page_obj'].elided_range,
+            list(response.context['page_obj'].paginator.page_range)
+        )
+
+    def test_fragments_follow_cursor(self):
+        """Фрагменты ленты по курсору отдают все посты без повторов."""
+        test_addresses = [
+            reverse('posts:index_fragment'),
+            reverse(
+                'posts:group_fragment', args=(
+                    PaginatorViewsTest.group.slug,)),
+            reverse(
+                'posts:profile_fragment', args=(
+                    PaginatorViewsTest.user.username,))
+        ]
+        for address in test_addresses:
+            with self.subTest(address=address):
+                cards = []
+                data = {'next_cursor': ''}
+                while data['next_cursor'] is not None:
+                    response = self.client.get(
+                        address, {'cursor': data['next_cursor']})
+                    data = response.json()
+                    cards.extend(
+                        data['html'].split('подробная информация')[:-1])
+                self.assertEqual(len(cards), Post.objects.count())
+
+    def test_fragment_bad_cursor(self):
+        """Испорченный курсор дает ответ 400."""
+        response = self.client.get(
+            reverse('posts:index_fragment'), {'cursor': 'broken'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+
+class RankingViewsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='post_author')
+        cls.quiet_post = Post.objects.create(author=cls.user, text=fake.text())
+        cls.hot_post = Post.objects.create(author=cls.user, text=fake.text())
+        Post.objects.filter(pk=cls.hot_post.pk).update(
+            pub_date=cls.quiet_post.pub_date - timedelta(hours=1))
+        Comment.objects.bulk_create([
+            Comment(post=cls.hot_post, author=cls.user, text=fake.text())
+            for _ in range(3)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_ranked_feeds(self):
+        """Ленты top и trending выводят посты по рейтингу."""
+        call_command('rank_posts', stdout=StringIO())
+        for query in ({'sort': 'top'}, {'sort': 'top', 'window': '7d'},
+                      {'sort': 'trending'}):
+            with self.subTest(query=query):
+                response = self.client.get(reverse('posts:index'), query)
+                self.assertEqual(
+                    list(response.context['page_obj']),
+                    [RankingViewsTest.hot_post, RankingViewsTest.quiet_post]
+                )
+
+    def test_top_score_counts_comments(self):
+        """Рейтинг top равен числу комментариев к посту."""
+        call_command('rank_posts', stdout=StringIO())
+        scores = dict(PostRank.objects.filter(
+            feed='top_24h').values_list('post', 'score'))
+        self.assertEqual(scores, {
+            RankingViewsTest.hot_post.pk: 3.0,
+            RankingViewsTest.quiet_post.pk: 0.0,
+        })
+
+    def test_rebuild_is_incremental(self):
+        """Повторный пересчет трогает только посты с новыми
+        комментариями и убирает посты, вышедшие из окна."""
+        ranking = get_ranking('top')
+        self.assertEqual(ranking.rebuild(), 2)
+        Comment.objects.create(
+            post=RankingViewsTest.quiet_post, author=self.user, text='новый')
+        self.assertEqual(ranking.rebuild(), 1)
+        self.assertEqual(ranking.rebuild(), 0)
+        self.assertEqual(
+            PostRank.objects.get(
+                feed=ranking.name, post=RankingViewsTest.quiet_post).score,
+            1.0
+        )
+        ranking.rebuild(now=timezone.now() + timedelta(days=2))
+        self.assertFalse(PostRank.objects.filter(feed=ranking.name).exists())
+
+    def test_default_feed_is_chronological(self):
+        """Без параметра sort главная страница остается хронологической."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(
+            response.context['page_obj'][0], RankingViewsTest.quiet_post)
+
+
+class CommentThreadsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='commentator')
+        cls.post = Post.objects.create(author=cls.user, text=fake.text())
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def reply(self, parent=None):
+        return Comment.objects.create(
+            post=CommentThreadsTest.post,
+            author=CommentThreadsTest.user,
+            parent=parent,
+            text=fake.text()
+        )
+
+    def test_reply_by_form(self):
+        """Ответ на комментарий попадает в его ветку."""
+        root = self.reply()
+        self.authorized_client.post(
+            reverse('posts:add_comment', args=(CommentThreadsTest.post.id,)),
+            {'text': 'ответ', 'parent': root.pk}
+        )
+        reply = Comment.objects.get(text='ответ')
+        root.refresh_from_db()
+        self.assertEqual(reply.parent, root)
+        self.assertEqual(reply.depth, 1)
+        self.assertTrue(reply.path.startswith(f'{root.path}.'))
+        self.assertEqual(root.replies_count, 1)
+
+    def test_invalid_parent(self):
+        """Нечисловой parent и reply_to не роняют страницу."""
+        response = self.authorized_client.post(
+            reverse('posts:add_comment', args=(CommentThreadsTest.post.id,)),
+            {'text': 'ответ', 'parent': 'abc'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertFalse(Comment.objects.exists())
+        response = self.client.get(
+            reverse('posts:post_detail', args=(CommentThreadsTest.post.id,)),
+            {'reply_to': '²'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @override_settings(COMMENT_REPLIES_NUMBER=2)
+    def test_replies_paged(self):
+        """Ответы ветки подгружаются порциями."""
+        root = self.reply()
+        replies = [self.reply(root) for _ in range(3)]
+        address = reverse(
+            'posts:comment_replies',
+            args=(CommentThreadsTest.post.id, root.pk)
+        )
+        response = self.client.get(address)
+        self.assertEqual(list(response.context['replies']), replies[:2])
+        response = self.client.get(
+            address, {'after': response.context['after']})
+        self.assertEqual(list(response.context['replies']), replies[2:])
+        self.assertIsNone(response.context['after'])
+
+    def test_threads_in_context(self):
+        """Ветки выводятся с ответами по порядку, глубокие ответы
+        подгружаются отдельно."""
+        root = self.reply()
+        branch = [root]
+        for _ in range(settings.COMMENT_TREE_DEPTH + 1):
+            branch.append(self.reply(branch[-1]))
+        sibling = self.reply(root)
+        other_root = self.reply()
+        response = self.client.get(
+            reverse('posts:post_detail', args=(CommentThreadsTest.post.id,)))
+        comments = response.context['comments']
+        self.assertEqual(list(comments), [other_root, root])
+        self.assertEqual(
+            comments[1].thread,
+            branch[1:settings.COMMENT_TREE_DEPTH + 1] + [sibling]
+        )
+        self.assertTrue(comments[1].thread[-2].has_hidden_replies)
+        response = self.client.get(reverse(
+            'posts:comment_replies',
+            args=(CommentThreadsTest.post.id, branch[-2].pk)
+        ))
+        self.assertEqual(list(response.context['replies']), [branch[-1]])
+
+    @override_settings(COMMENT_MAX_DEPTH=1)
+    def test_max_depth(self):
+        """Ответ на комментарий максимальной глубины становится
+        ответом на его родителя."""
+        root = self.reply()
+        reply = self.reply(root)
+        deep_reply = self.reply(reply)
+        self.assertEqual(deep_reply.parent, root)
+        self.assertEqual(deep_reply.depth, 1)
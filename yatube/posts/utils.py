@@ -1,9 +1,162 @@
+import binascii
+
 from django.conf import settings
+from django.core.exceptions import SuspiciousOperation, ValidationError
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+
+ELLIPSIS = '…'
+
+
+class CountedPaginator(Paginator):
+    """Paginator, который берет число объектов у стратегии подсчета
+    вместо SELECT COUNT(*) по всей выборке.
+
+    Если стратегия считает не дальше limit (см. posts.counts.
+    bounded_count), число, дошедшее до limit, означает "не меньше":
+    capped сообщает шаблону, что страниц может быть больше.
+    """
+
+    def __init__(self, object_list, per_page, count, limit=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_strategy = count
+        self.limit = limit
 
+    @cached_property
+    def count(self):
+        return self.count_strategy()
 
-def page_paginator(post_list, request):
-    paginator = Paginator(post_list, settings.VIEW_POST_NUMBER)
+    @cached_property
+    def capped(self):
+        return self.limit is not None and self.count >= self.limit
+
+
+def page_paginator(post_list, request, count=None, limit=None):
+    """Страница ленты; count - функция, возвращающая число постов
+    (см. posts.counts), без нее посты считаются запросом COUNT;
+    limit - предел, дальше которого count не считает."""
+    if count is None:
+        paginator = Paginator(post_list, settings.VIEW_POST_NUMBER)
+    else:
+        paginator = CountedPaginator(
+            post_list, settings.VIEW_POST_NUMBER, count, limit)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    page_obj.elided_range = elided_page_range(page_obj)
+    return page_obj
+
+
+def elided_page_range(page_obj, on_each_side=2, on_ends=1):
+    """Номера страниц для навигации: первые, последние и окно вокруг
+    текущей, пропуски отмечены ELLIPSIS.
+
+    Длина списка не зависит от числа страниц, как в
+    Paginator.get_elided_page_range из Django 3.2.
+    """
+    number = page_obj.number
+    num_pages = page_obj.paginator.num_pages
+    if num_pages <= (on_each_side + on_ends) * 2 + 1:
+        return list(range(1, num_pages + 1))
+    pages = []
+    if number > on_each_side + on_ends + 2:
+        pages.extend(range(1, on_ends + 1))
+        pages.append(ELLIPSIS)
+        pages.extend(range(number - on_each_side, number + 1))
+    else:
+        pages.extend(range(1, number + 1))
+    if number < num_pages - on_each_side - on_ends - 1:
+        pages.extend(range(number + 1, number + on_each_side + 1))
+        pages.append(ELLIPSIS)
+        pages.extend(range(num_pages - on_ends + 1, num_pages + 1))
+    else:
+        pages.extend(range(number + 1, num_pages + 1))
+    return pages
+
+
+def encode_cursor(obj, field):
+    value = getattr(obj, field)
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    return urlsafe_base64_encode(f'{value}|{obj.pk}'.encode())
+
+
+def decode_cursor(cursor, model, field):
+    """Значение поля сортировки и id из курсора; испорченный курсор
+    дает ответ 400."""
+    try:
+        value, pk = urlsafe_base64_decode(cursor).decode().split('|')
+        return model._meta.get_field(field).to_python(value), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError,
+            ValidationError):
+        raise SuspiciousOperation('Некорректный курсор')
+
+
+def keyset_page(object_list, cursor=None, field='pub_date', size=None):
+    """Следующая порция объектов после курсора и курсор за ней.
+
+    В отличие от номера страницы курсор хранит значение поля
+    сортировки и id последнего показанного объекта, поэтому база
+    не пропускает OFFSET строк, а лента не сдвигается, когда сверху
+    появляются новые записи. Сортировка - по убыванию field и id.
+    """
+    size = size or settings.VIEW_POST_NUMBER
+    object_list = object_list.order_by(f'-{field}', '-pk')
+    if cursor:
+        value, pk = decode_cursor(cursor, object_list.model, field)
+        object_list = object_list.filter(
+            Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk}))
+    items = list(object_list[:size + 1])
+    if len(items) <= size:
+        return items, None
+    items = items[:size]
+    return items, encode_cursor(items[-1], field)
+
+
+def parse_id(value):
+    """id из параметра запроса или None, если это не число."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def wants_fragment(request):
+    """Клиент просит вместо редиректа вернуть готовый фрагмент
+    страницы: заголовок HX-Request, как в протоколе htmx."""
+    return request.headers.get('HX-Request') == 'true'
+
+
+def comment_threads(post, request):
+    """Страница веток комментариев поста.
+
+    К каждому корневому комментарию страницы в thread добавляются
+    ответы до глубины COMMENT_TREE_DEPTH, отсортированные по пути.
+    Все ответы страницы загружаются одним запросом по индексу
+    (post, path), более глубокие ветки подгружаются отдельно.
+    """
+    paginator = Paginator(
+        post.comments.filter(depth=0).select_related('author'),
+        settings.COMMENT_THREADS_NUMBER
+    )
+    page_obj = paginator.get_page(request.GET.get('comments_page'))
+    roots = {root.path: root for root in page_obj.object_list}
+    page_obj.object_list = list(roots.values())
+    if not roots:
+        return page_obj
+    subtrees = Q()
+    for root in page_obj.object_list:
+        root.thread = []
+        subtrees |= Q(**root.subtree_range())
+    replies = post.comments.filter(
+        subtrees, depth__lte=settings.COMMENT_TREE_DEPTH
+    ).select_related('author').order_by('path')
+    for reply in replies:
+        reply.has_hidden_replies = (
+            reply.depth == settings.COMMENT_TREE_DEPTH
+            and reply.replies_count > 0
+        )
+        roots[reply.path.split('.', 1)[0]].thread.append(reply)
     return page_obj
@@ -1,74 +1,282 @@
+from functools import partial
+from http import HTTPStatus
+
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.template.loader import render_to_string
+from django.views.decorators.http import require_POST
+
+from core.cache import shared_cache_page
+from core.queries import fetch_concurrently
+from core.ratelimit import ratelimit
 
-from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
-from .utils import page_paginator
+from . import group_stats, rollups
+from .archive import ArchiveChain, author_posts_count, keyset_chain
+from .comment_buffer import comment_buffer, is_hot, post_exists
+from .counts import cached_count, stored_count
+from .follow_graph import (
+    contains, followee_ids, follower_ids, forget_follows
+)
+from .follow_state import get_follow_state
+from .forms import CommentForm, PostForm, PublicationForm
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Follow, Group, Post, PostCounter,
+    User
+)
+from .ranking import get_ranking
+from .tasks import enqueue_thumbnail
+from .utils import (
+    comment_threads, keyset_page, page_paginator, parse_id, wants_fragment
+)
 
 
-@cache_page(1 * settings.CACHE_NUMBER, key_prefix='index_page')
+@shared_cache_page(1 * settings.CACHE_NUMBER, key_prefix='index_page')
 def index(request):
-    page_obj = page_paginator(Post.objects.select_related(
-        'author'), request)
-    context = {'page_obj': page_obj}
+    ranking = get_ranking(
+        request.GET.get('sort'), request.GET.get('window'))
+    limit = None
+    if ranking:
+        post_list = ranking.posts()
+        count = partial(cached_count, post_list)
+        limit = settings.COUNT_LIMIT
+    else:
+        post_list = Post.objects.published()
+        count = partial(stored_count, PostCounter.ALL)
+    page_obj = page_paginator(
+        post_list.select_related('author'), request, count, limit)
+    context = {
+        'page_obj': page_obj,
+        'ranking': ranking,
+        'page_query': ranking.query if ranking else '',
+    }
     return render(request, 'posts/index.html', context)
 
 
+def post_cards(request, post_list, archived_list=None, **context):
+    """Карточки постов без обвязки страницы для бесконечной ленты;
+    после постов post_list идут архивные из archived_list."""
+    post_list = post_list.select_related('author', 'group')
+    cursor = request.GET.get('cursor')
+    if archived_list is None:
+        posts, next_cursor = keyset_page(post_list, cursor)
+    else:
+        posts, next_cursor = keyset_chain(
+            post_list,
+            archived_list.select_related('author', 'group'),
+            cursor
+        )
+    if context.get('follow_buttons'):
+        get_follow_state(request).prefetch(post.author_id for post in posts)
+    html = render_to_string(
+        'posts/includes/post_cards.html',
+        {'posts': posts, **context},
+        request
+    )
+    return JsonResponse({'html': html, 'next_cursor': next_cursor})
+
+
+@shared_cache_page(1 * settings.CACHE_NUMBER, key_prefix='index_fragment')
+def index_fragment(request):
+    return post_cards(request, Post.objects.published())
+
+
+def group_fragment(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return post_cards(
+        request, group.posts.published(), follow_buttons=True)
+
+
+def group_index(request):
+    sort = request.GET.get('sort')
+    field, stats = group_stats.directory(sort)
+    groups, next_cursor = keyset_page(
+        stats, request.GET.get('cursor'), field, settings.GROUPS_NUMBER)
+    context = {
+        'groups': groups,
+        'sort': sort if sort in group_stats.SORTS else 'posts',
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    page_obj = page_paginator(group.posts.select_related(
-        'author', 'group'), request)
+    page_obj = page_paginator(
+        group.posts.published().select_related('author', 'group'),
+        request,
+        partial(stored_count, PostCounter.GROUP, group.pk)
+    )
+    get_follow_state(request).prefetch(
+        post.author_id for post in page_obj)
     context = {
         'group': group,
         'page_obj': page_obj,
+        'follow_buttons': True,
     }
     return render(request, 'posts/group_list.html', context)
 
 
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    page_obj = page_paginator(user.posts.select_related(
-        'author', 'group'), request)
-    following = (
-        request.user.is_authenticated
-        and Follow.objects.filter(
-            user=request.user, author=user).exists()
+    author = get_object_or_404(User, username=username)
+    is_authenticated = request.user.is_authenticated
+    posts = ArchiveChain(
+        author.posts.published().select_related('author', 'group'),
+        author.archived_posts.published().select_related('author', 'group'),
+        partial(stored_count, PostCounter.AUTHOR, author.pk)
+    )
+    results = fetch_concurrently(
+        page_obj=lambda: page_paginator(posts, request, posts.count),
+        following=lambda: is_authenticated and contains(
+            followee_ids(request.user.pk), author.pk),
+        followers_count=lambda: len(follower_ids(author.pk)),
+        activity=lambda: list(rollups.author_activity(author.pk)),
     )
     context = {
-        'author': user,
-        'page_obj': page_obj,
-        'following': following,
+        'author': author,
+        'page_obj': results['page_obj'],
+        'following': results['following'],
+        'followers_count': results['followers_count'],
+        'heatmap': rollups.heatmap(results['activity']),
+        'heatmap_levels': rollups.LEVELS,
     }
+    if request.user == author:
+        context['drafts'] = author.posts.filter(
+            status__in=[Post.DRAFT, Post.SCHEDULED]
+        ).order_by('status', 'publish_at')
     return render(request, 'posts/profile.html', context)
 
 
+def profile_stats(request, username):
+    """Активность автора по дням из готовых дневных сводок."""
+    author = get_object_or_404(User, username=username)
+    try:
+        days = int(request.GET.get('days', settings.ACTIVITY_DAYS))
+    except ValueError:
+        days = settings.ACTIVITY_DAYS
+    if days < 1:
+        days = settings.ACTIVITY_DAYS
+    days = min(days, settings.ACTIVITY_MAX_DAYS)
+    rows = list(rollups.author_activity(author.pk, days))
+    return JsonResponse({
+        'days': rows,
+        'totals': rollups.totals(rows),
+    })
+
+
+def profile_fragment(request, username):
+    author = get_object_or_404(User, username=username)
+    return post_cards(
+        request,
+        author.posts.published(),
+        author.archived_posts.published()
+    )
+
+
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    form = CommentForm()
-    comments = post.comments.all()
+    post = Post.objects.select_related(
+        'author', 'group').filter(id=post_id).first()
+    archived = post is None
+    if archived:
+        post = get_object_or_404(
+            ArchivedPost.objects.published().select_related(
+                'author', 'group'),
+            id=post_id
+        )
+    elif not post.is_visible_to(request.user):
+        raise Http404
+    results = fetch_concurrently(
+        comments=lambda: comment_threads(post, request),
+        author_posts_count=partial(author_posts_count, post.author_id),
+    )
+    comments = results['comments']
+    keys = request.session.get('pending_comments')
+    if keys and comments.number == 1:
+        pending = comment_buffer.pending(post.pk, request.user.pk, keys)
+        for comment in pending:
+            comment.thread = []
+        comments.object_list = pending + comments.object_list
+        if not pending:
+            del request.session['pending_comments']
+    get_follow_state(request).prefetch(
+        comment.author_id
+        for root in comments
+        for comment in [root, *root.thread]
+    )
+    reply_to_id = parse_id(request.GET.get('reply_to'))
+    reply_to = None
+    if reply_to_id is not None:
+        reply_to = post.comments.filter(pk=reply_to_id).first()
     context = {
         'post': post,
-        'form': form,
+        'form': CommentForm(),
         'comments': comments,
+        'author_posts_count': results['author_posts_count'],
+        'reply_to': reply_to,
+        'archived': archived,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def comment_replies(request, post_id, comment_id):
+    comment = Comment.objects.filter(
+        pk=comment_id, post_id=post_id).select_related('post').first()
+    if comment is None:
+        comment = get_object_or_404(
+            ArchivedComment.objects.filter(post__status=Post.PUBLISHED),
+            pk=comment_id, post_id=post_id
+        )
+    elif not comment.post.is_visible_to(request.user):
+        raise Http404
+    replies = type(comment).objects.filter(
+        post_id=post_id, **comment.subtree_range()
+    ).select_related('author').order_by('path')
+    if request.GET.get('after'):
+        replies = replies.filter(path__gt=request.GET['after'])
+    replies = list(replies[:settings.COMMENT_REPLIES_NUMBER + 1])
+    more = len(replies) > settings.COMMENT_REPLIES_NUMBER
+    replies = replies[:settings.COMMENT_REPLIES_NUMBER]
+    context = {
+        'post': comment.post,
+        'comment': comment,
+        'replies': replies,
+        'after': replies[-1].path if more else None,
+        'archived': isinstance(comment, ArchivedComment),
+    }
+    return render(request, 'posts/includes/comment_replies.html', context)
+
+
 @login_required
+@ratelimit('post_create')
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
-    if form.is_valid():
+    publication_form = PublicationForm(
+        request.POST or None, instance=form.instance)
+    if all([form.is_valid(), publication_form.is_valid()]):
         new_post = form.save(commit=False)
         new_post.author = request.user
         form.save()
+        enqueue_thumbnail(new_post)
+        if wants_fragment(request):
+            return render(
+                request, 'includes/article.html', {'post': new_post},
+                status=HTTPStatus.CREATED
+            )
         return redirect('posts:profile', request.user.username)
-    return render(request, 'posts/create_post.html', {'form': form})
+    if form.is_bound and wants_fragment(request):
+        return form_errors(request, form if form.errors else publication_form)
+    context = {
+        'form': form,
+        'publication_form': publication_form,
+    }
+    return render(request, 'posts/create_post.html', context)
 
 
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.exclude(status=Post.DELETED), id=post_id)
     if request.user != post.author:
         return redirect('posts:post_detail', post_id=post_id)
     form = PostForm(
@@ -76,42 +284,116 @@ def post_edit(request, post_id):
         files=request.FILES or None,
         instance=post
     )
-    if form.is_valid():
+    publication_form = PublicationForm(request.POST or None, instance=post)
+    if all([form.is_valid(), publication_form.is_valid()]):
         form.save()
+        enqueue_thumbnail(post)
+        if wants_fragment(request):
+            return render(request, 'includes/article.html', {'post': post})
         return redirect('posts:post_detail', post_id=post_id)
+    if form.is_bound and wants_fragment(request):
+        return form_errors(request, form if form.errors else publication_form)
     context = {
         'post': post,
         'form': form,
+        'publication_form': publication_form,
         'is_edit': True,
     }
     return render(request, 'posts/create_post.html', context)
 
 
 @login_required
+@require_POST
+def post_delete(request, post_id):
+    post = get_object_or_404(
+        Post.objects.exclude(status=Post.DELETED),
+        id=post_id,
+        author=request.user
+    )
+    post.soft_delete()
+    return redirect('posts:profile', request.user.username)
+
+
+@login_required
+@ratelimit('add_comment')
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
+    if (form.is_valid() and not request.POST.get('parent')
+            and is_hot(post_id)):
+        if not post_exists(post_id):
+            raise Http404
+        comment = form.save(commit=False)
+        comment.author = request.user
+        comment.post_id = post_id
+        key = comment_buffer.add(comment)
+        if not wants_fragment(request):
+            request.session['pending_comments'] = [
+                *request.session.get('pending_comments', []), key]
+        return comment_added(request, comment)
+    post = get_object_or_404(Post.objects.published(), id=post_id)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
+        parent_id = request.POST.get('parent')
+        if parent_id:
+            comment.parent = get_object_or_404(
+                Comment, pk=parse_id(parent_id), post=post)
         form.save()
+        return comment_added(request, comment)
+    if form.is_bound and wants_fragment(request):
+        return form_errors(request, form)
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def comment_added(request, comment):
+    if wants_fragment(request):
+        return render(
+            request, 'posts/includes/comment.html', {'comment': comment},
+            status=HTTPStatus.CREATED
+        )
+    return redirect('posts:post_detail', post_id=comment.post_id)
+
+
+def form_errors(request, form):
+    return render(
+        request, 'posts/includes/mistakes.html', {'form': form},
+        status=HTTPStatus.BAD_REQUEST
+    )
+
+
+def followed_posts(user):
+    authors = followee_ids(user.pk)
+    if len(authors) <= settings.FOLLOW_GRAPH_IN_LIMIT:
+        return Post.objects.published().filter(author_id__in=list(authors))
+    return Post.objects.published().filter(author__following__user=user)
+
+
 @login_required
 def follow_index(request):
-    follow_posts = Post.objects.filter(
-        author__following__user=request.user
+    post_list = followed_posts(request.user)
+    page_obj = page_paginator(
+        post_list.select_related('author', 'group'),
+        request,
+        partial(cached_count, post_list),
+        settings.COUNT_LIMIT
     )
-    page_obj = page_paginator(follow_posts, request)
+    suggestions = request.user.follow_suggestions.select_related(
+        'author')[:settings.SUGGESTIONS_NUMBER]
     context = {
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'suggestions': suggestions,
     }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+def follow_fragment(request):
+    return post_cards(request, followed_posts(request.user))
+
+
+@login_required
+@ratelimit('follow', methods=('GET',))
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user != author:
@@ -124,3 +406,31 @@ def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', author.username)
+
+
+@login_required
+@require_POST
+@ratelimit('follow')
+def follow_bulk(request):
+    authors = User.objects.filter(
+        username__in=request.POST.getlist('author')
+    ).exclude(pk=request.user.pk)
+    with transaction.atomic():
+        Follow.objects.bulk_create(
+            [Follow(user=request.user, author=author) for author in authors],
+            ignore_conflicts=True
+        )
+        request.user.follow_suggestions.filter(author__in=authors).delete()
+        forget_follows(
+            request.user.pk, [author.pk for author in authors])
+    return redirect('posts:follow_index')
+
+
+@login_required
+@require_POST
+def unfollow_bulk(request):
+    Follow.objects.filter(
+        user=request.user,
+        author__username__in=request.POST.getlist('author')
+    ).delete()
+    return redirect('posts:follow_index')
@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from users.backends import user_cache_key
+
+User = get_user_model()
+
+
+class CachedUserTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_authorized_request_without_queries(self):
+        """Повторный запрос авторизованного пользователя не обращается
+        к базе за сессией и пользователем."""
+        address = reverse('about:author')
+        self.authorized_client.get(address)
+        with self.assertNumQueries(0):
+            response = self.authorized_client.get(address)
+        self.assertEqual(response.context['user'], self.user)
+        with self.assertNumQueries(0):
+            self.guest_client.get(address)
+
+    def test_cached_user_invalidated_on_save(self):
+        """Сохранение пользователя и смена пароля сбрасывают кеш."""
+        self.authorized_client.get(reverse('about:author'))
+        self.assertIsNotNone(cache.get(user_cache_key(self.user.pk)))
+        self.user.set_password('n3w-pa55word')
+        self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+
+    def test_old_sessions_stay_logged_in(self):
+        """Сессии, созданные со стандартным бэкендом, остаются
+        авторизованными."""
+        user = User.objects.create_user(username='old_session')
+        client = Client()
+        client.force_login(
+            user, backend='django.contrib.auth.backends.ModelBackend')
+        response = client.get(reverse('about:author'))
+        self.assertEqual(response.context['user'], user)
@@ -31,6 +31,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -58,8 +60,22 @@ TEMPLATES = [
     },
 ]
 
+MINIFY_TEMPLATES = False
+
+if MINIFY_TEMPLATES:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'core.template_loaders.FilesystemLoader',
+            'core.template_loaders.AppDirectoriesLoader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+ASGI_THREADS = 10
+QUERY_THREADS = 4
+
 
 DATABASES = {
     'default': {
@@ -98,10 +114,44 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
+STATIC_SERVE = True
+STATIC_MAX_AGE = 60 * 60 * 24 * 365
+
+COMPRESS_MIN_SIZE = 200
+COMPRESS_LEVEL = 6
 
 VIEW_POST_NUMBER = 10
+COUNT_LIMIT = 10000
+COUNT_CACHE_TIMEOUT = 60 * 5
+PUBLISH_BATCH_SIZE = 500
+ARCHIVE_AFTER_DAYS = 365
+ARCHIVE_BATCH_SIZE = 500
+GROUPS_NUMBER = 20
+ACTIVE_AUTHORS_DAYS = 7
+ACTIVITY_DAYS = 365
+ACTIVITY_MAX_DAYS = 365 * 5
 FIRST_SYMBOLS_NUMBER = 15
 CACHE_NUMBER = 20
+RANK_REACH_WEIGHT = 0.5
+RANK_TRENDING_HOURS = 12
+SUGGESTIONS_NUMBER = 5
+FOLLOW_GRAPH_TIMEOUT = 60 * 60
+FOLLOW_GRAPH_IN_LIMIT = 500
+COMMENT_THREADS_NUMBER = 10
+COMMENT_TREE_DEPTH = 3
+COMMENT_REPLIES_NUMBER = 50
+COMMENT_MAX_DEPTH = 10
+COMMENT_HOT_THRESHOLD = 20
+COMMENT_BATCH_SIZE = 50
+COMMENT_BATCH_DELAY = 0.05
+COMMENT_BUFFER_TIMEOUT = 60 * 60
+
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -119,3 +169,19 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+USER_CACHE_TIMEOUT = 60 * 15
+
+TASK_BROKER = 'core.tasks.DatabaseBroker'
+TASK_KEY_TIMEOUT = 60 * 60 * 24
+TASK_LOCK_TIMEOUT = 60 * 10
+
+RATELIMIT_ENABLED = True
+RATELIMITS = {
+    'post_create': ('30/m', 'user'),
+    'add_comment': ('30/m', 'user'),
+    'follow': ('60/m', 'user'),
+    'signup': ('10/h', 'ip'),
+}